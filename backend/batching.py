@@ -0,0 +1,194 @@
+"""Coalescing of small utility prompts into a single fast-model request."""
+
+import asyncio
+import json
+import time
+from typing import List, Optional, Tuple
+
+from .config import FLASH_MODEL
+from .openrouter import query_model
+
+# How long to wait for other prompts to join a batch (seconds)
+BATCH_WINDOW = 0.05
+
+_MULTIPLEX_PROMPT = """Complete each of the following independent tasks.
+
+{tasks}
+
+Return ONLY a JSON object mapping each task id to that task's answer as a string, e.g. {{"t0": "...", "t1": "..."}}."""
+
+
+# Circuit breaker settings for the utility model
+BREAKER_WINDOW = 60.0  # seconds
+BREAKER_MIN_FAILURES = 3
+BREAKER_FAILURE_RATIO = 0.5
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker over a fixed time window.
+
+    Opens once at least BREAKER_MIN_FAILURES calls failed and failures make
+    up more than BREAKER_FAILURE_RATIO of the calls in the current window.
+    Counters reset when the window expires.
+    """
+
+    def __init__(
+        self,
+        window: float = BREAKER_WINDOW,
+        min_failures: int = BREAKER_MIN_FAILURES,
+        failure_ratio: float = BREAKER_FAILURE_RATIO
+    ):
+        self.window = window
+        self.min_failures = min_failures
+        self.failure_ratio = failure_ratio
+        self.reset()
+
+    def reset(self):
+        self.failures = 0
+        self.successes = 0
+        self.window_start = time.monotonic()
+
+    def _roll_window(self):
+        if time.monotonic() - self.window_start > self.window:
+            self.reset()
+
+    def record(self, success: bool):
+        self._roll_window()
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+
+    def is_open(self) -> bool:
+        self._roll_window()
+        total = self.failures + self.successes
+        return self.failures >= self.min_failures and self.failures / total > self.failure_ratio
+
+
+class FlashBatcher:
+    """
+    Coalesce concurrent single-prompt calls to the fast utility model.
+
+    Prompts submitted within BATCH_WINDOW of each other are sent as one
+    multiplexed request and the JSON answer is split back per prompt. A lone
+    prompt is sent as-is, and a batch whose answer can't be parsed falls back
+    to individual requests. A request is cancelled once all of its callers
+    are. While the model keeps failing, the circuit breaker short-circuits
+    every prompt to None so callers use their local fallbacks.
+    """
+
+    def __init__(self, model: str = FLASH_MODEL, window: float = BATCH_WINDOW, timeout: float = 30.0):
+        self.model = model
+        self.window = window
+        self.timeout = timeout
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.breaker = CircuitBreaker()
+
+    async def ask(self, prompt: str) -> Optional[str]:
+        """
+        Submit a prompt and wait for its answer.
+
+        Args:
+            prompt: Self-contained prompt text
+
+        Returns:
+            The model's answer, or None if the request failed or the breaker is open
+        """
+        if self.breaker.is_open():
+            print(f"Circuit breaker open for {self.model}, skipping request")
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._flush_task is not None and self._flush_task.get_loop() is not loop:
+            # Left over from a closed event loop (e.g. between test runs)
+            self._pending, self._flush_task = [], None
+
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window)
+        batch, self._pending = self._pending, []
+        self._flush_task = None
+
+        # Callers cancelled while the batch was filling need no answer
+        batch = [(prompt, future) for prompt, future in batch if not future.done()]
+        if not batch:
+            return
+
+        request = asyncio.ensure_future(self._ask_batch([prompt for prompt, _ in batch]))
+
+        def abandon_if_unwanted(_):
+            if all(future.cancelled() for _, future in batch):
+                request.cancel()
+
+        for _, future in batch:
+            future.add_done_callback(abandon_if_unwanted)
+
+        try:
+            answers = await request
+        except asyncio.CancelledError:
+            # Every caller was cancelled, so nobody is waiting for answers
+            return
+        except Exception as e:
+            print(f"Error in batched {self.model} request: {e}")
+            answers = [None] * len(batch)
+
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+    async def _ask_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        if len(prompts) == 1:
+            return [await self._ask_single(prompts[0])]
+        return await self._ask_multiplexed(prompts)
+
+    async def _ask_single(self, prompt: str) -> Optional[str]:
+        response = await query_model(self.model, [{"role": "user", "content": prompt}], timeout=self.timeout)
+        success = bool(response) and not response.get('error')
+        self.breaker.record(success)
+        if not success:
+            return None
+        return response.get('content', '')
+
+    async def _ask_multiplexed(self, prompts: List[str]) -> List[Optional[str]]:
+        task_ids = [f"t{i}" for i in range(len(prompts))]
+        tasks_text = "\n\n".join(
+            f'Task "{task_id}":\n{prompt}'
+            for task_id, prompt in zip(task_ids, prompts)
+        )
+        content = await self._ask_single(_MULTIPLEX_PROMPT.format(tasks=tasks_text))
+
+        answers = _parse_multiplexed(content, task_ids)
+        if answers is None:
+            print(f"Could not split batched {self.model} answer, retrying prompts individually")
+            return list(await asyncio.gather(*(self._ask_single(prompt) for prompt in prompts)))
+        return answers
+
+
+def _parse_multiplexed(content: Optional[str], task_ids: List[str]) -> Optional[List[str]]:
+    """Split a multiplexed JSON answer, or return None if any task is missing."""
+    if not content:
+        return None
+
+    start, end = content.find('{'), content.rfind('}')
+    if start < 0 or end < start:
+        return None
+
+    try:
+        data = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+    if not isinstance(data, dict) or any(task_id not in data for task_id in task_ids):
+        return None
+
+    return [str(data[task_id]) for task_id in task_ids]
+
+
+flash_batcher = FlashBatcher()
@@ -0,0 +1,219 @@
+"""In-process response caches for LLM requests and complete council runs."""
+
+import asyncio
+import functools
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .config import LLM_CACHE_MAX_ENTRIES, COUNCIL_CACHE_MAX_ENTRIES
+
+# Messages containing timestamps or UUIDs are unlikely to repeat, so caching
+# them only evicts useful entries.
+VOLATILE_PATTERN = re.compile(
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}'
+    r'|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
+    re.IGNORECASE
+)
+
+
+class LRUCache:
+    """Minimal least-recently-used cache backed by an OrderedDict."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: str, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_response_cache = LRUCache(LLM_CACHE_MAX_ENTRIES)
+_council_cache = LRUCache(COUNCIL_CACHE_MAX_ENTRIES)
+_function_caches: List[LRUCache] = []
+
+
+def make_cache_key(model: str, messages: List[Dict[str, str]]) -> str:
+    """
+    Build a stable cache key for a model request.
+
+    Personas are injected as system messages, so they are covered by the
+    serialized messages.
+
+    Args:
+        model: OpenRouter model identifier
+        messages: List of message dicts with 'role' and 'content'
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = model + json.dumps(messages, sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def is_cacheable(messages: List[Dict[str, str]]) -> bool:
+    """Check whether a request is worth caching."""
+    if not messages:
+        return False
+    return not VOLATILE_PATTERN.search(messages[-1].get('content', ''))
+
+
+def cached_llm(func):
+    """
+    Cache successful responses of an async `(model, messages, ...)` query function.
+
+    Error responses are never cached so transient failures are retried.
+    """
+    @functools.wraps(func)
+    async def wrapper(model: str, messages: List[Dict[str, str]], *args, **kwargs):
+        if LLM_CACHE_MAX_ENTRIES <= 0 or not is_cacheable(messages):
+            return await func(model, messages, *args, **kwargs)
+
+        key = make_cache_key(model, messages)
+        cached = _response_cache.get(key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        response = await func(model, messages, *args, **kwargs)
+        if response is not None and not response.get('error'):
+            _response_cache.set(key, response)
+        return response
+
+    return wrapper
+
+
+def single_flight_cache(maxsize: int):
+    """
+    Cache an async function's results by argument, sharing in-flight calls.
+
+    Concurrent calls with the same arguments await one underlying call, which
+    is cancelled once every caller waiting on it has been cancelled. None
+    results are not cached, so functions can signal a failure worth retrying.
+    """
+    def decorator(func):
+        results = LRUCache(maxsize)
+        _function_caches.append(results)
+        # Underlying call and number of callers waiting on it, per arguments
+        in_flight: Dict[Any, List[Any]] = {}
+
+        def forget(args, task):
+            entry = in_flight.get(args)
+            if entry is not None and entry[0] is task:
+                del in_flight[args]
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            cached = results.get(args)
+            if cached is not None:
+                return cached
+
+            entry = in_flight.get(args)
+            if entry is None:
+                task = asyncio.ensure_future(func(*args))
+                entry = in_flight[args] = [task, 0]
+                task.add_done_callback(lambda done: forget(args, done))
+            task = entry[0]
+
+            entry[1] += 1
+            try:
+                # Shielded so one caller cancelling doesn't fail the others
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if entry[1] == 1 and not task.done():
+                    # Nobody else is waiting for this call
+                    task.cancel()
+                    forget(args, task)
+                raise
+            finally:
+                entry[1] -= 1
+
+            if result is not None:
+                results.set(args, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def normalize_prompt(text: str) -> str:
+    """Fold case and whitespace so trivially different prompts share a cache entry."""
+    return " ".join(text.casefold().split())
+
+
+def make_council_key(
+    messages: List[Dict[str, Any]],
+    council_models: List[str],
+    chairman_model: str,
+    model_personas: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Build a cache key for a complete council run.
+
+    Args:
+        messages: Conversation history ending with the new user message
+        council_models: List of council model identifiers
+        chairman_model: Chairman model identifier
+        model_personas: Optional mapping of model ID to persona
+
+    Returns:
+        Hex digest identifying the run
+    """
+    # Earlier council turns are represented by their final answer
+    history = [
+        [msg.get('role'), normalize_prompt(msg.get('content') or msg.get('stage3', {}).get('response', ''))]
+        for msg in messages
+    ]
+    payload = json.dumps(
+        [council_models, chairman_model, model_personas or {}, history],
+        sort_keys=True
+    )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def get_council_result(key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached stages of a council run, or None."""
+    if COUNCIL_CACHE_MAX_ENTRIES <= 0:
+        return None
+    return _council_cache.get(key)
+
+
+def store_council_result(key: str, messages: List[Dict[str, Any]], result: Dict[str, Any]):
+    """
+    Cache the stages of a successful council run.
+
+    Args:
+        key: Key from make_council_key
+        messages: Conversation history the run answered
+        result: Dict with 'stage1', 'stage2', 'stage3' and 'metadata'
+    """
+    if COUNCIL_CACHE_MAX_ENTRIES <= 0 or not is_cacheable(messages):
+        return
+    if not result['stage1'] or result['stage3'].get('model') == 'error':
+        return
+    _council_cache.set(key, result)
+
+
+def clear_cache():
+    """Drop all cached responses, council results and memoized functions."""
+    _response_cache.clear()
+    _council_cache.clear()
+    for results in _function_caches:
+        results.clear()
@@ -19,6 +19,9 @@ COUNCIL_MODELS = [
 # Chairman model - synthesizes final response
 CHAIRMAN_MODEL = "google/gemini-3-pro-preview"
 
+# Fast, cheap model for utility calls (titles, ranking extraction, persona resolution)
+FLASH_MODEL = "google/gemini-3-flash-preview"
+
 # Default council mode
 DEFAULT_MODE = "standard"
 
@@ -26,5 +29,27 @@ DEFAULT_MODE = "standard"
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
 
+# Retry policy for transient OpenRouter errors (429, 5xx, timeouts)
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0  # seconds, doubled on every attempt
+RETRY_MAX_DELAY = 30.0
+
 # Data directory for conversation storage
 DATA_DIR = "data/conversations"
+
+# Maximum number of LLM responses kept in the in-process cache (0 disables it)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "4096"))
+
+# Maximum number of complete council results kept for repeated prompts (0 disables it)
+COUNCIL_CACHE_MAX_ENTRIES = int(os.getenv("COUNCIL_CACHE_MAX_ENTRIES", "256"))
+
+# Maximum concurrent OpenRouter requests per upstream provider (model ID prefix)
+PROVIDER_CONCURRENCY = int(os.getenv("PROVIDER_CONCURRENCY", "32"))
+
+# Maximum concurrent OpenRouter requests overall; rate limits apply per API
+# key, so this caps bursts from several councils running at once
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+
+# Seconds to wait for the slowest model in each parallel council stage before
+# dropping it (unset means wait for every model's own request timeout)
+STAGE_DEADLINE = float(os.environ["STAGE_DEADLINE"]) if os.getenv("STAGE_DEADLINE") else None
@@ -1,16 +1,123 @@
 """3-stage LLM Council orchestration."""
 
-import json
-from typing import List, Dict, Any, Tuple
-from .openrouter import query_models_parallel, query_model
+import asyncio
+import re
+from typing import List, Dict, Any, Tuple, Optional, Awaitable, AsyncIterator
+
+import orjson
+
+from .openrouter import query_models_parallel, query_model, stream_model
 from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
-from .pricing import calculate_cost, calculate_total_stats
+from .config import STAGE_DEADLINE, FLASH_MODEL
+from .batching import flash_batcher
+from .cache import single_flight_cache
+from . import storage
+from .pricing import calculate_total_stats, UsageView
+from .reasoning import is_reasoning_model
+
+# Ranking parser patterns, compiled once at import
+_JSON_BLOCK_RE = re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL)
+_JSON_RANKING_RE = re.compile(r'(\{.*"ranking".*\})', re.DOTALL)
+_NUMBERED_RE = re.compile(r'\d+[\.\)]\s*(Response\s+[A-Z])', re.IGNORECASE)
+_RESP_RE = re.compile(r'Response\s+[A-Z]', re.IGNORECASE)
+_LETTER_RE = re.compile(r'\d+[\.\)]\s*([A-Z])(?!\w)')
+# Start of a per-response section in a Stage 2 evaluation (e.g. "**Response A:**")
+_SECTION_RE = re.compile(r'^[#*\s]*(Response [A-Z])\b', re.MULTILINE)
+# Start of the ranking tail that follows the per-response sections
+_RANKING_TAIL_RE = re.compile(r'^[#*\s]*(?:FINAL RANKING|```json|\{\s*"ranking")', re.MULTILINE)
+
+# Rebuttal prompt pieces. The prefix is identical for every model in a round
+# so providers with automatic prefix caching can reuse it; only the middle
+# section is built per model.
+_REBUTTAL_PREFIX_TMPL = """You previously answered a user question. Other AI models have now reviewed and ranked all answers, including yours.
+
+Original Question: {user_query}
+"""
+
+_REBUTTAL_MIDDLE_TMPL = """
+You are identified as {my_label}.
+
+Your Original Answer:
+{original_response}
+
+---
+PEER REVIEWS AND RANKINGS:
+{critiques}
+---
+"""
+
+_REBUTTAL_SUFFIX = """
+Your Task:
+1. Read the critiques of your specific answer (identified by your label above).
+2. Decide if you want to update or refine your answer based on valid points raised by peers.
+3. If your original answer was perfect, just repeat it. If you missed something, fix it.
+4. Provide your FINAL, revised answer. Do not include "Thinking" or meta-commentary about the process in the final output, just the answer.
+
+Revised Answer:"""
+
+_CHAIRMAN_PROMPT_TMPL = """You are the Chairman of an LLM Council. Multiple AI models have provided responses to a user's question, and then ranked each other's responses.
+
+Original Question: {user_query}
+
+STAGE 1 - Individual Responses:
+{stage1_text}
+
+STAGE 2 - Peer Rankings:
+{stage2_text}
+
+Your task as Chairman is to synthesize all of this information into a single, comprehensive, accurate answer to the user's original question. Consider:
+- The individual responses and their insights
+- The peer rankings and what they reveal about response quality
+- Any patterns of agreement or disagreement
+
+Provide a clear, well-reasoned final answer that represents the council's collective wisdom:"""
+
+
+async def gather_with_deadline(
+    tasks: Dict[str, Awaitable],
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run keyed awaitables concurrently, dropping any still pending at the deadline.
+
+    Args:
+        tasks: Mapping of key (usually model ID) to awaitable
+        deadline: Seconds to wait for the whole batch, or None to wait for all
+
+    Returns:
+        Dict mapping key to result for every task that finished in time
+    """
+    if not tasks:
+        return {}
+
+    futures = {asyncio.ensure_future(task): key for key, task in tasks.items()}
+    try:
+        done, pending = await asyncio.wait(futures, timeout=deadline)
+    except asyncio.CancelledError:
+        # asyncio.wait doesn't cancel its children; stop the model calls too
+        for future in futures:
+            future.cancel()
+        raise
+
+    for future in pending:
+        print(f"Stage deadline exceeded, dropping {futures[future]}")
+        future.cancel()
+
+    results = {}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            print(f"Unexpected error in council task {futures[future]}: {e}")
+
+    return results
 
 
 async def stage1_collect_responses(
     messages: List[Dict[str, str]],
     council_models: List[str],
-    model_personas: Dict[str, str] = None
+    model_personas: Dict[str, str] = None,
+    stage_deadline: Optional[float] = STAGE_DEADLINE
 ) -> List[Dict[str, Any]]:
     """
     Stage 1: Collect individual responses from all council models.
@@ -19,19 +126,18 @@ async def stage1_collect_responses(
         messages: Full conversation history
         council_models: List of model identifiers
         model_personas: Optional mapping of model ID to system prompt/persona
+        stage_deadline: Seconds to wait for the slowest model before dropping it
 
     Returns:
         List of dicts with 'model' and 'response' keys
     """
-    import asyncio
-    
     # Create tasks for each model
-    tasks = []
+    tasks = {}
     
     for model in council_models:
-        # Clone messages to avoid modifying the original list for other models
-        model_messages = list(messages)
-        
+        # query_model never mutates messages, so models without a persona share the list
+        model_messages = messages
+
         # Inject persona if available
         if model_personas and model in model_personas:
             persona = model_personas[model]
@@ -39,45 +145,48 @@ async def stage1_collect_responses(
             # Note: Some models might not support system messages, but OpenRouter usually handles this
             # or we could use 'reasoning.py' helpers to check.
             # For simplicity, we prepend a system message.
-            model_messages.insert(0, {"role": "system", "content": persona})
-            
-        tasks.append(query_model(model, model_messages))
+            model_messages = [{"role": "system", "content": persona}, *messages]
 
-    # Wait for all to complete
-    responses_list = await asyncio.gather(*tasks)
-    
-    # Map back to model names
-    responses = {model: response for model, response in zip(council_models, responses_list)}
-
-    # Format results
-    stage1_results = []
-    for model, response in responses.items():
-        if response is not None:
-            usage = response.get('usage', {})
-            cost = calculate_cost(
-                model,
-                usage.get('prompt_tokens', 0),
-                usage.get('completion_tokens', 0)
-            )
-
-            result_entry = {
-                "model": model,
-                "response": response.get('content', ''),
-                "thinking": response.get('thinking', ''),
-                "is_reasoning_model": response.get('is_reasoning_model', False),
-                "usage": usage,
-                "cost": cost,
-                "persona": model_personas.get(model) if model_personas else None
-            }
-            
-            if response.get('error'):
-                result_entry['error'] = response['error']
-                
-            stage1_results.append(result_entry)
+        tasks[model] = query_model(model, model_messages)
+
+    # Wait for all to complete (or the stage deadline to pass)
+    responses = await gather_with_deadline(tasks, stage_deadline)
+
+    # Format results in council order
+    stage1_results = [
+        _format_stage1_entry(model, responses[model], model_personas)
+        for model in council_models
+        if responses.get(model) is not None
+    ]
 
     return stage1_results
 
 
+def _format_stage1_entry(
+    model: str,
+    response: Dict[str, Any],
+    model_personas: Dict[str, str] = None
+) -> Dict[str, Any]:
+    """Build a Stage 1 result entry from a model's response."""
+    usage = response.get('usage', {})
+    cost = UsageView.from_dict(usage).cost(model)
+
+    result_entry = {
+        "model": model,
+        "response": response.get('content', ''),
+        "thinking": response.get('thinking', ''),
+        "is_reasoning_model": response.get('is_reasoning_model', False),
+        "usage": usage,
+        "cost": cost,
+        "persona": model_personas.get(model) if model_personas else None
+    }
+
+    if response.get('error'):
+        result_entry['error'] = response['error']
+
+    return result_entry
+
+
 async def extract_ranking_with_llm(ranking_text: str, labels: List[str]) -> List[str]:
     """
     Use a fast LLM to extract the ranking if regex parsing fails.
@@ -98,17 +207,15 @@ Example output: Response C, Response A, Response B
 
 Final Ranking:"""
 
-    messages = [{"role": "user", "content": prompt}]
-    
-    # Use a fast, cheap model for extraction (same as title generation)
-    response = await query_model("google/gemini-3-flash-preview", messages, timeout=20.0)
-    
-    if not response:
+    # Use a fast, cheap model for extraction (same as title generation); concurrent
+    # extractions and title generation are coalesced into one request
+    content = await flash_batcher.ask(prompt)
+
+    if not content:
         return []
-        
-    content = response.get('content', '').strip()
-    
-    import re
+
+    content = content.strip()
+
     # Extract labels from the response
     found_labels = []
     for label in labels:
@@ -131,18 +238,15 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
     Returns:
         List of response labels in ranked order
     """
-    import re
-    import json
-
     # Method 1: Try to find and parse a JSON block
     # Look for ```json ... ``` or just { ... } at the end
-    json_match = re.search(r'```json\s*(\{.*?\})\s*```', ranking_text, re.DOTALL)
+    json_match = _JSON_BLOCK_RE.search(ranking_text)
     if not json_match:
-        json_match = re.search(r'(\{.*"ranking".*\})', ranking_text, re.DOTALL)
+        json_match = _JSON_RANKING_RE.search(ranking_text)
     
     if json_match:
         try:
-            data = json.loads(json_match.group(1))
+            data = orjson.loads(json_match.group(1))
             if "ranking" in data and isinstance(data["ranking"], list):
                 return data["ranking"]
         except:
@@ -159,12 +263,12 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
             search_text = parts[-1]
     
     # Pattern 1: Numbered "Response X" (e.g., "1. Response A" or "1) Response A")
-    numbered_matches = re.findall(r'\d+[\.\)]\s*(Response\s+[A-Z])', search_text, re.IGNORECASE)
+    numbered_matches = _NUMBERED_RE.findall(search_text)
     if numbered_matches:
         return [m.replace("Response", "Response ").replace("  ", " ").strip().title() for m in numbered_matches]
 
     # Pattern 2: Just "Response X" patterns in order
-    matches = re.findall(r'Response\s+[A-Z]', search_text, re.IGNORECASE)
+    matches = _RESP_RE.findall(search_text)
     if matches:
         # Deduplicate while preserving order
         seen = set()
@@ -178,18 +282,46 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
 
     # Pattern 3: If in FINAL RANKING section, look for single letters
     if "FINAL RANKING:" in text:
-        letters = re.findall(r'\d+[\.\)]\s*([A-Z])(?!\w)', search_text)
+        letters = _LETTER_RE.findall(search_text)
         if letters:
             return [f"Response {l}" for l in letters]
 
     return []
 
 
+def salvage_ranking_from_text(ranking_text: str, labels: List[str]) -> List[str]:
+    """
+    Best-effort local ranking extraction for text the regex parser couldn't handle.
+
+    Only the text after the last mention of "ranking" is considered, so the
+    per-response evaluations (usually written in label order) don't masquerade
+    as a ranking. Labels are ordered by their first occurrence in that section.
+
+    Args:
+        ranking_text: The full text response from the model
+        labels: Anonymized response labels
+
+    Returns:
+        Labels in ranked order, or an empty list if any label is missing
+    """
+    section_start = ranking_text.lower().rfind("ranking")
+    if section_start < 0:
+        return []
+
+    section = ranking_text[section_start:]
+    positions = [(section.find(label), label) for label in labels]
+    if any(position < 0 for position, _ in positions):
+        return []
+
+    return [label for _, label in sorted(positions)]
+
+
 async def stage2_collect_rankings(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     council_models: List[str],
-    model_personas: Dict[str, str] = None
+    model_personas: Dict[str, str] = None,
+    stage_deadline: Optional[float] = STAGE_DEADLINE
 ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
     """
     Stage 2: Each model ranks the anonymized responses.
@@ -199,6 +331,7 @@ async def stage2_collect_rankings(
         stage1_results: Results from Stage 1
         council_models: List of model identifiers
         model_personas: Optional mapping of model ID to persona
+        stage_deadline: Seconds to wait for the slowest reviewer before dropping it
 
     Returns:
         Tuple of (rankings list, label_to_model mapping)
@@ -207,10 +340,7 @@ async def stage2_collect_rankings(
     labels = [f"Response {chr(65 + i)}" for i in range(len(stage1_results))]
 
     # Create mapping from label to model name
-    label_to_model = {
-        label: result['model']
-        for label, result in zip(labels, stage1_results)
-    }
+    label_to_model = dict(zip(labels, (result['model'] for result in stage1_results)))
 
     # Build the ranking prompt
     responses_text = "\n\n".join([
@@ -246,68 +376,116 @@ The "ranking" list must contain the response labels in order from best to worst.
 
 Now provide your evaluation and ranking:"""
 
-    import asyncio
-    tasks = []
-    
-    for model in council_models:
+    async def rank_with_model(model: str) -> Optional[Dict[str, Any]]:
         messages = [{"role": "user", "content": ranking_prompt}]
         # Inject persona if available
         if model_personas and model in model_personas:
             messages.insert(0, {"role": "system", "content": model_personas[model]})
-        tasks.append(query_model(model, messages))
 
-    # Get rankings from all council models in parallel
-    responses_list = await asyncio.gather(*tasks)
-    responses = {model: response for model, response in zip(council_models, responses_list)}
+        response = await query_model(model, messages)
+        if response is None:
+            return None
+
+        full_text = response.get('content', '')
+
+        # Step 1: Try regex parsing
+        parsed = parse_ranking_from_text(full_text)
+
+        # Step 2: Salvage locally from the ranking section before paying for an LLM call
+        # We expect parsed to have the same number of items as stage1_results
+        if len(parsed) < len(stage1_results):
+            salvaged = salvage_ranking_from_text(full_text, labels)
+            if len(salvaged) == len(labels):
+                parsed = salvaged
+
+        # Step 3: Fallback to LLM extraction if local parsing failed to find all responses
+        # Only run extraction if there is actual content and no error
+        if not response.get('error') and len(parsed) < len(stage1_results):
+            llm_parsed = await extract_ranking_with_llm(full_text, labels)
+            if len(llm_parsed) >= len(parsed):
+                parsed = llm_parsed
+
+        usage = response.get('usage', {})
+        cost = UsageView.from_dict(usage).cost(model)
+
+        result_entry = {
+            "model": model,
+            "ranking": full_text,
+            "thinking": response.get('thinking', ''),
+            "is_reasoning_model": response.get('is_reasoning_model', False),
+            "parsed_ranking": parsed,
+            "usage": usage,
+            "cost": cost
+        }
 
-    # Format results
-    stage2_results = []
-    for model, response in responses.items():
-        if response is not None:
-            full_text = response.get('content', '')
-            
-            # Step 1: Try regex parsing
-            parsed = parse_ranking_from_text(full_text)
-            
-            # Step 2: Fallback to LLM extraction if regex failed to find all responses
-            # We expect parsed to have the same number of items as stage1_results
-            # Only run extraction if there is actual content and no error
-            if not response.get('error') and len(parsed) < len(stage1_results):
-                llm_parsed = await extract_ranking_with_llm(full_text, labels)
-                if len(llm_parsed) >= len(parsed):
-                    parsed = llm_parsed
-
-            usage = response.get('usage', {})
-            cost = calculate_cost(
-                model,
-                usage.get('prompt_tokens', 0),
-                usage.get('completion_tokens', 0)
-            )
-
-            result_entry = {
-                "model": model,
-                "ranking": full_text,
-                "thinking": response.get('thinking', ''),
-                "is_reasoning_model": response.get('is_reasoning_model', False),
-                "parsed_ranking": parsed,
-                "usage": usage,
-                "cost": cost
-            }
+        if response.get('error'):
+            result_entry['error'] = response['error']
 
-            if response.get('error'):
-                result_entry['error'] = response['error']
+        return result_entry
 
-            stage2_results.append(result_entry)
+    # Get rankings from all council models in parallel; each model's ranking is
+    # parsed as soon as it arrives instead of after the slowest reviewer
+    rankings = await gather_with_deadline(
+        {model: rank_with_model(model) for model in council_models},
+        stage_deadline
+    )
+
+    # Format results in council order
+    stage2_results = [rankings[model] for model in council_models if rankings.get(model) is not None]
 
     return stage2_results, label_to_model
 
 
+def split_critique_by_label(critique_text: str, labels: List[str]) -> Dict[str, str]:
+    """
+    Split a Stage 2 evaluation into per-response sections.
+
+    Sections start at lines beginning with a response label (e.g. "Response A:"
+    or "**Response B**"); the last one ends where the FINAL RANKING or JSON
+    ranking tail begins. If fewer than half of the labels have a section, the
+    evaluation isn't structured enough to split and every label maps to the
+    full text.
+
+    Args:
+        critique_text: Full evaluation text from a reviewer
+        labels: Anonymized response labels
+
+    Returns:
+        Dict mapping label to the critique text about that response
+    """
+    starts = [
+        (match.start(), match.group(1))
+        for match in _SECTION_RE.finditer(critique_text)
+        if match.group(1) in labels
+    ]
+
+    body_end = len(critique_text)
+    if starts:
+        tail = _RANKING_TAIL_RE.search(critique_text, starts[0][0])
+        if tail:
+            body_end = tail.start()
+            # Plain ranking lines ("Response C") look like section starts
+            starts = [(start, label) for start, label in starts if start < body_end]
+
+    sections = {}
+    for i, (start, label) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else body_end
+        section = critique_text[start:end].strip()
+        sections[label] = f"{sections[label]}\n\n{section}" if label in sections else section
+
+    if len(sections) < len(labels) / 2:
+        return {label: critique_text for label in labels}
+
+    return sections
+
+
 async def stage2_5_rebuttal(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
     label_to_model: Dict[str, str],
-    model_personas: Dict[str, str] = None
+    model_personas: Dict[str, str] = None,
+    stage_deadline: Optional[float] = STAGE_DEADLINE
 ) -> List[Dict[str, Any]]:
     """
     Stage 2.5: Rebuttal Round. Models see critiques and can update their answers.
@@ -318,6 +496,7 @@ async def stage2_5_rebuttal(
         stage2_results: Peer rankings and critiques
         label_to_model: Mapping of labels to model names
         model_personas: Optional personas
+        stage_deadline: Seconds to wait for rebuttals; late models keep their original answer
 
     Returns:
         List of updated stage1-like results (or original if no update)
@@ -325,26 +504,30 @@ async def stage2_5_rebuttal(
     # Create mapping of model -> critique text received
     model_critiques = {result['model']: [] for result in stage1_results}
     
+    labels = list(label_to_model.keys())
+    model_to_label = {model: label for label, model in label_to_model.items()}
+
+    # Split each evaluation once so each model only receives the section about itself
+    sections_per_reviewer = [
+        split_critique_by_label(ranking_result['ranking'], labels)
+        for ranking_result in stage2_results
+    ]
+
     # Invert the rankings to gather critiques FOR each model
     # stage2_results contains what each model SAID about others
-    for ranking_result in stage2_results:
+    for ranking_result, sections in zip(stage2_results, sections_per_reviewer):
         reviewer_model = ranking_result['model']
         critique_text = ranking_result['ranking']
-        
-        # We need to extract the specific critique for each model if possible
-        # Since the full text contains all critiques, we'll just pass the full text 
-        # and let the model find the section about itself.
-        # Ideally, we would parse this better, but passing full context is safer.
+
         for label, target_model in label_to_model.items():
             if target_model in model_critiques:
                 model_critiques[target_model].append(
-                    f"Critique from Peer ({reviewer_model}):\n{critique_text}"
+                    f"Critique from Peer ({reviewer_model}):\n{sections.get(label, critique_text)}"
                 )
 
     # Prepare rebuttal tasks
-    import asyncio
-    tasks = []
-    participating_models = []
+    tasks = {}
+    rebuttal_prefix = _REBUTTAL_PREFIX_TMPL.format(user_query=user_query)
 
     for result in stage1_results:
         model = result['model']
@@ -354,48 +537,31 @@ async def stage2_5_rebuttal(
         if not critiques:
             continue
 
-        participating_models.append(model)
-        
         # Identify which label this model was
-        my_label = next((l for l, m in label_to_model.items() if m == model), "Unknown")
-
-        rebuttal_prompt = f"""You previously answered a user question. Other AI models have now reviewed and ranked all answers, including yours (you are identified as {my_label}).
-
-Original Question: {user_query}
-
-Your Original Answer:
-{original_response}
-
----
-PEER REVIEWS AND RANKINGS:
-{critiques}
----
-
-Your Task:
-1. Read the critiques of your specific answer ({my_label}).
-2. Decide if you want to update or refine your answer based on valid points raised by peers.
-3. If your original answer was perfect, just repeat it. If you missed something, fix it.
-4. Provide your FINAL, revised answer. Do not include "Thinking" or meta-commentary about the process in the final output, just the answer.
+        my_label = model_to_label.get(model, "Unknown")
 
-Revised Answer:"""
+        rebuttal_prompt = rebuttal_prefix + _REBUTTAL_MIDDLE_TMPL.format(
+            my_label=my_label,
+            original_response=original_response,
+            critiques=critiques
+        ) + _REBUTTAL_SUFFIX
 
         messages = [{"role": "user", "content": rebuttal_prompt}]
-        
+
         # Inject persona if available
         if model_personas and model in model_personas:
-            messages.insert(0, {"role": "system", "content": model_personas[model]})
+            messages = [{"role": "system", "content": model_personas[model]}, *messages]
 
-        tasks.append(query_model(model, messages))
+        tasks[model] = query_model(model, messages)
 
     if not tasks:
         return stage1_results
 
     # Run rebuttals in parallel
-    rebuttal_responses = await asyncio.gather(*tasks)
-    
+    rebuttal_map = await gather_with_deadline(tasks, stage_deadline)
+
     # Merge results
     updated_results = []
-    rebuttal_map = {model: resp for model, resp in zip(participating_models, rebuttal_responses)}
 
     for result in stage1_results:
         model = result['model']
@@ -403,20 +569,9 @@ Revised Answer:"""
             new_response = rebuttal_map[model]
             
             # Combine costs
-            original_usage = result.get('usage', {})
-            new_usage = new_response.get('usage', {})
-            
-            combined_usage = {
-                'prompt_tokens': original_usage.get('prompt_tokens', 0) + new_usage.get('prompt_tokens', 0),
-                'completion_tokens': original_usage.get('completion_tokens', 0) + new_usage.get('completion_tokens', 0),
-                'total_tokens': original_usage.get('total_tokens', 0) + new_usage.get('total_tokens', 0)
-            }
-            
-            combined_cost = result.get('cost', 0) + calculate_cost(
-                model, 
-                new_usage.get('prompt_tokens', 0), 
-                new_usage.get('completion_tokens', 0)
-            )
+            new_usage = UsageView.from_dict(new_response.get('usage'))
+            combined_usage = (UsageView.from_dict(result.get('usage')) + new_usage).to_dict()
+            combined_cost = result.get('cost', 0) + new_usage.cost(model)
 
             updated_results.append({
                 "model": model,
@@ -435,56 +590,36 @@ Revised Answer:"""
     return updated_results
 
 
-async def stage3_synthesize_final(
+def _format_stage1_for_chairman(result: Dict[str, Any]) -> str:
+    """Format one Stage 1 result (with its thinking, if any) for the chairman prompt."""
+    thinking_text = ""
+    if result.get('thinking'):
+        thinking_text = f"Thinking Process:\n{result['thinking']}\n\n"
+
+    return f"Model: {result['model']}\n{thinking_text}Response: {result['response']}"
+
+
+def _chairman_messages(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
     chairman_model: str,
     model_personas: Dict[str, str] = None
-) -> Dict[str, Any]:
-    """
-    Stage 3: Chairman synthesizes final response.
-
-    Args:
-        user_query: The original user query
-        stage1_results: Individual model responses from Stage 1
-        stage2_results: Rankings from Stage 2
-        chairman_model: Model identifier for the chairman
-        model_personas: Optional mapping of model ID to persona
-
-    Returns:
-        Dict with 'model' and 'response' keys
-    """
+) -> List[Dict[str, str]]:
+    """Build the Stage 3 request for the chairman."""
     # Build comprehensive context for chairman
-    stage1_text = ""
-    for result in stage1_results:
-        thinking_text = ""
-        if result.get('thinking'):
-            thinking_text = f"Thinking Process:\n{result['thinking']}\n\n"
-        
-        stage1_text += f"Model: {result['model']}\n{thinking_text}Response: {result['response']}\n\n"
+    stage1_text = "\n\n".join(map(_format_stage1_for_chairman, stage1_results))
 
     stage2_text = "\n\n".join([
         f"Model: {result['model']}\nRanking: {result['ranking']}"
         for result in stage2_results
     ])
 
-    chairman_prompt = f"""You are the Chairman of an LLM Council. Multiple AI models have provided responses to a user's question, and then ranked each other's responses.
-
-Original Question: {user_query}
-
-STAGE 1 - Individual Responses:
-{stage1_text}
-
-STAGE 2 - Peer Rankings:
-{stage2_text}
-
-Your task as Chairman is to synthesize all of this information into a single, comprehensive, accurate answer to the user's original question. Consider:
-- The individual responses and their insights
-- The peer rankings and what they reveal about response quality
-- Any patterns of agreement or disagreement
-
-Provide a clear, well-reasoned final answer that represents the council's collective wisdom:"""
+    chairman_prompt = _CHAIRMAN_PROMPT_TMPL.format(
+        user_query=user_query,
+        stage1_text=stage1_text,
+        stage2_text=stage2_text
+    )
 
     messages = [{"role": "user", "content": chairman_prompt}]
     
@@ -492,9 +627,11 @@ Provide a clear, well-reasoned final answer that represents the council's collec
     if model_personas and chairman_model in model_personas:
         messages.insert(0, {"role": "system", "content": model_personas[chairman_model]})
 
-    # Query the chairman model
-    response = await query_model(chairman_model, messages)
+    return messages
+
 
+def _stage3_entry(chairman_model: str, response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Format the chairman's response (or its failure) as the Stage 3 result."""
     if response is None:
         # Fallback if chairman fails
         return {
@@ -505,11 +642,7 @@ Provide a clear, well-reasoned final answer that represents the council's collec
         }
 
     usage = response.get('usage', {})
-    cost = calculate_cost(
-        chairman_model,
-        usage.get('prompt_tokens', 0),
-        usage.get('completion_tokens', 0)
-    )
+    cost = UsageView.from_dict(usage).cost(chairman_model)
 
     return {
         "model": chairman_model,
@@ -521,6 +654,72 @@ Provide a clear, well-reasoned final answer that represents the council's collec
     }
 
 
+async def stage3_synthesize_final(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    stage2_results: List[Dict[str, Any]],
+    chairman_model: str,
+    model_personas: Dict[str, str] = None
+) -> Dict[str, Any]:
+    """
+    Stage 3: Chairman synthesizes final response.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Individual model responses from Stage 1
+        stage2_results: Rankings from Stage 2
+        chairman_model: Model identifier for the chairman
+        model_personas: Optional mapping of model ID to persona
+
+    Returns:
+        Dict with 'model' and 'response' keys
+    """
+    messages = _chairman_messages(user_query, stage1_results, stage2_results, chairman_model, model_personas)
+
+    # Query the chairman model
+    response = await query_model(chairman_model, messages)
+
+    return _stage3_entry(chairman_model, response)
+
+
+async def stage3_synthesize_stream(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    stage2_results: List[Dict[str, Any]],
+    chairman_model: str,
+    model_personas: Dict[str, str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stage 3, streamed: yield the chairman's answer as it is written.
+
+    Reasoning models are not streamed, since their raw output starts with
+    the thinking that Stage 3 strips from the answer.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Individual model responses from Stage 1
+        stage2_results: Rankings from Stage 2
+        chairman_model: Model identifier for the chairman
+        model_personas: Optional mapping of model ID to persona
+
+    Yields:
+        {'delta': text} chunks, then {'result': <stage3_synthesize_final result>}
+    """
+    messages = _chairman_messages(user_query, stage1_results, stage2_results, chairman_model, model_personas)
+
+    if is_reasoning_model(chairman_model):
+        response = await query_model(chairman_model, messages)
+    else:
+        response = None
+        async for event in stream_model(chairman_model, messages):
+            if 'delta' in event:
+                yield event
+            else:
+                response = event['response']
+
+    yield {'result': _stage3_entry(chairman_model, response)}
+
+
 def calculate_aggregate_rankings(
     stage2_results: List[Dict[str, Any]],
     label_to_model: Dict[str, str]
@@ -535,10 +734,8 @@ def calculate_aggregate_rankings(
     Returns:
         List of dicts with model name and average rank, sorted best to worst
     """
-    from collections import defaultdict
-
-    # Track positions for each model
-    model_positions = defaultdict(list)
+    # Track [count, sum of positions] for each model
+    model_stats = {}
 
     for ranking in stage2_results:
         # Use the pre-parsed ranking which includes fallback logic results
@@ -550,19 +747,19 @@ def calculate_aggregate_rankings(
 
         for position, label in enumerate(parsed_ranking, start=1):
             if label in label_to_model:
-                model_name = label_to_model[label]
-                model_positions[model_name].append(position)
+                entry = model_stats.setdefault(label_to_model[label], [0, 0])
+                entry[0] += 1
+                entry[1] += position
 
     # Calculate average position for each model
-    aggregate = []
-    for model, positions in model_positions.items():
-        if positions:
-            avg_rank = sum(positions) / len(positions)
-            aggregate.append({
-                "model": model,
-                "average_rank": round(avg_rank, 2),
-                "rankings_count": len(positions)
-            })
+    aggregate = [
+        {
+            "model": model,
+            "average_rank": round(position_sum / count, 2),
+            "rankings_count": count
+        }
+        for model, (count, position_sum) in model_stats.items()
+    ]
 
     # Sort by average rank (lower is better)
     aggregate.sort(key=lambda x: x['average_rank'])
@@ -580,6 +777,15 @@ async def generate_conversation_title(user_query: str) -> str:
     Returns:
         A short title (3-5 words)
     """
+    title = await _generate_title(user_query)
+
+    # Fallback to a generic title
+    return title or "New Conversation"
+
+
+@single_flight_cache(maxsize=512)
+async def _generate_title(user_query: str) -> Optional[str]:
+    """Ask the flash model for a title; None if it failed (so it isn't cached)."""
     title_prompt = f"""Generate a very short title (3-5 words maximum) that summarizes the following question.
 The title should be concise and descriptive. Do not use quotes or punctuation in the title.
 
@@ -587,16 +793,14 @@ Question: {user_query}
 
 Title:"""
 
-    messages = [{"role": "user", "content": title_prompt}]
+    # Use the flash model for title generation (fast and cheap), batched with
+    # any concurrent ranking extractions
+    title = await flash_batcher.ask(title_prompt)
 
-    # Use gemini-3-flash-preview for title generation (fast and cheap)
-    response = await query_model("google/gemini-3-flash-preview", messages, timeout=30.0)
-
-    if response is None:
-        # Fallback to a generic title
-        return "New Conversation"
+    if not title:
+        return None
 
-    title = response.get('content', 'New Conversation').strip()
+    title = title.strip()
 
     # Clean up the title - remove quotes, limit length
     title = title.strip('"\'')
@@ -691,7 +895,7 @@ JSON Output:"""
     
     print(f"Resolving personas for mode: {mode}")
     # Use a fast model for this
-    response = await query_model("google/gemini-3-flash-preview", messages, timeout=20.0)
+    response = await query_model(FLASH_MODEL, messages, timeout=20.0)
     
     if not response or not response.get('content'):
         print("Failed to get response for persona resolution")
@@ -710,7 +914,7 @@ JSON Output:"""
                 lines = lines[:-1]
             content = '\n'.join(lines).strip()
         
-        personas = json.loads(content)
+        personas = orjson.loads(content)
         print(f"Parsed personas: {personas}")
         # Ensure only provided models are in the dict
         return {m: p for m, p in personas.items() if m in all_models}
@@ -726,8 +930,8 @@ async def get_council_config(
     """
     Extract council configuration and resolve dynamic personas if needed.
     """
+    # Imported here so runtime updates from POST /api/config are picked up
     from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
-    from . import storage
 
     council_models = conversation.get("council_models", COUNCIL_MODELS)
     chairman_model = conversation.get("chairman_model", CHAIRMAN_MODEL)
@@ -739,7 +943,7 @@ async def get_council_config(
         model_personas = await resolve_council_mode(mode, user_query, council_models, chairman_model)
         # Update conversation with resolved personas so they persist
         conversation["model_personas"] = model_personas
-        storage.save_conversation(conversation)
+        await asyncio.to_thread(storage.save_conversation, conversation)
     
     return council_models, chairman_model, model_personas
 
@@ -748,7 +952,8 @@ async def run_full_council(
     messages: List[Dict[str, str]],
     council_models: List[str],
     chairman_model: str,
-    model_personas: Dict[str, str] = None
+    model_personas: Dict[str, str] = None,
+    stage_deadline: Optional[float] = STAGE_DEADLINE
 ) -> Tuple[List, List, Dict, Dict]:
     """
     Run the complete 3-stage council process.
@@ -758,6 +963,7 @@ async def run_full_council(
         council_models: List of model identifiers
         chairman_model: Model identifier for the chairman
         model_personas: Optional mapping of model ID to system prompt/persona
+        stage_deadline: Per-stage deadline in seconds for the parallel stages
 
     Returns:
         Tuple of (stage1_results, stage2_results, stage3_result, metadata)
@@ -766,7 +972,7 @@ async def run_full_council(
     user_query = messages[-1]['content'] if messages else ""
 
     # Stage 1: Collect individual responses
-    stage1_results = await stage1_collect_responses(messages, council_models, model_personas)
+    stage1_results = await stage1_collect_responses(messages, council_models, model_personas, stage_deadline)
 
     # If no models responded successfully, return error
     if not stage1_results:
@@ -776,7 +982,9 @@ async def run_full_council(
         }, {}
 
     # Stage 2: Collect rankings
-    stage2_results, label_to_model = await stage2_collect_rankings(user_query, stage1_results, council_models, model_personas)
+    stage2_results, label_to_model = await stage2_collect_rankings(
+        user_query, stage1_results, council_models, model_personas, stage_deadline
+    )
 
     # Calculate aggregate rankings
     aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
@@ -788,7 +996,8 @@ async def run_full_council(
         stage1_results,
         stage2_results,
         label_to_model,
-        model_personas
+        model_personas,
+        stage_deadline
     )
 
     # Stage 3: Synthesize final answer
@@ -1,322 +1,398 @@
 """Export utilities for conversations."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 from datetime import datetime
-import json
+from functools import lru_cache
+import io
 
+import orjson
 
-def export_to_markdown(conversation: Dict[str, Any]) -> str:
-    """
-    Export a conversation to Markdown format.
-
-    Args:
-        conversation: Full conversation object with messages
-
-    Returns:
-        Markdown string
-    """
-    lines = []
-
-    # Header
-    lines.append(f"# {conversation.get('title', 'Conversation')}")
-    lines.append("")
-    lines.append(f"**Date:** {conversation.get('created_at', 'Unknown')}")
-    lines.append(f"**ID:** {conversation.get('id', 'Unknown')}")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-
-    # Messages
-    for i, msg in enumerate(conversation.get('messages', []), 1):
-        if msg['role'] == 'user':
-            lines.append(f"## Message {i}: User")
-            lines.append("")
-            lines.append(msg['content'])
-            lines.append("")
-
-        elif msg['role'] == 'assistant':
-            lines.append(f"## Message {i}: Council Response")
-            lines.append("")
-
-            # Stage 1: Individual Responses
-            stage1 = msg.get('stage1', [])
-            if stage1:
-                lines.append("### Stage 1: Individual Responses")
-                lines.append("")
-                for response in stage1:
-                    model_name = response.get('model', 'Unknown')
-                    model_short = model_name.split('/')[-1] if '/' in model_name else model_name
-                    lines.append(f"#### {model_short}")
-                    lines.append("")
-                    lines.append(response.get('response', ''))
-                    lines.append("")
-
-            # Stage 2: Peer Rankings
-            stage2 = msg.get('stage2', [])
-            metadata = msg.get('metadata', {})
-            if stage2:
-                lines.append("### Stage 2: Peer Rankings")
-                lines.append("")
-
-                # Aggregate rankings
-                aggregate = metadata.get('aggregate_rankings', [])
-                if aggregate:
-                    lines.append("#### Aggregate Rankings")
-                    lines.append("")
-                    lines.append("| Rank | Model | Avg Score | Votes |")
-                    lines.append("|------|-------|-----------|-------|")
-                    for idx, agg in enumerate(aggregate, 1):
-                        model_short = agg['model'].split('/')[-1] if '/' in agg['model'] else agg['model']
-                        lines.append(f"| {idx} | {model_short} | {agg['average_rank']:.2f} | {agg['rankings_count']} |")
-                    lines.append("")
-
-                # Individual rankings
-                for ranking in stage2:
-                    model_name = ranking.get('model', 'Unknown')
-                    model_short = model_name.split('/')[-1] if '/' in model_name else model_name
-                    lines.append(f"#### {model_short}'s Evaluation")
-                    lines.append("")
-                    lines.append(ranking.get('ranking', ''))
-                    lines.append("")
-
-            # Stage 3: Final Synthesis
-            stage3 = msg.get('stage3', {})
-            if stage3:
-                lines.append("### Stage 3: Final Answer")
-                lines.append("")
-                chairman = stage3.get('model', 'Unknown')
-                chairman_short = chairman.split('/')[-1] if '/' in chairman else chairman
-                lines.append(f"**Chairman:** {chairman_short}")
-                lines.append("")
-                lines.append(stage3.get('response', ''))
-                lines.append("")
-
-        lines.append("---")
-        lines.append("")
-
-    return "\n".join(lines)
-
-
-def export_to_json(conversation: Dict[str, Any], pretty: bool = True) -> str:
-    """
-    Export a conversation to JSON format.
-
-    Args:
-        conversation: Full conversation object with messages
-        pretty: Whether to pretty-print the JSON
-
-    Returns:
-        JSON string
-    """
-    if pretty:
-        return json.dumps(conversation, indent=2, ensure_ascii=False)
-    return json.dumps(conversation, ensure_ascii=False)
-
-
-def export_to_html(conversation: Dict[str, Any]) -> str:
-    """
-    Export a conversation to HTML format (used for PDF generation).
-
-    Args:
-        conversation: Full conversation object with messages
-
-    Returns:
-        HTML string
-    """
-    html = []
-
-    # HTML header with styling
-    html.append("""<!DOCTYPE html>
+# Static HTML document head, split around the (escaped) title
+_HTML_HEAD_PREFIX = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
-    <title>{title}</title>
+    <title>"""
+
+_HTML_HEAD_SUFFIX = """</title>
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
             line-height: 1.6;
             color: #333;
             max-width: 900px;
             margin: 40px auto;
             padding: 20px;
-        }}
-        h1 {{
+        }
+        h1 {
             color: #2c3e50;
             border-bottom: 3px solid #4a90e2;
             padding-bottom: 10px;
-        }}
-        h2 {{
+        }
+        h2 {
             color: #34495e;
             margin-top: 30px;
             border-left: 4px solid #4a90e2;
             padding-left: 10px;
-        }}
-        h3 {{
+        }
+        h3 {
             color: #4a90e2;
             margin-top: 20px;
-        }}
-        h4 {{
+        }
+        h4 {
             color: #666;
             margin-top: 15px;
-        }}
-        .metadata {{
+        }
+        .metadata {
             color: #666;
             font-size: 14px;
             margin-bottom: 20px;
-        }}
-        .user-message {{
+        }
+        .user-message {
             background: #f8f9fa;
             padding: 15px;
             border-radius: 8px;
             border-left: 4px solid #4a90e2;
             margin: 20px 0;
-        }}
-        .assistant-section {{
+        }
+        .assistant-section {
             margin: 20px 0;
-        }}
-        .stage {{
+        }
+        .stage {
             margin: 20px 0;
             padding: 15px;
             background: #f8f9fa;
             border-radius: 8px;
-        }}
-        .stage1 {{
+        }
+        .stage1 {
             border-left: 4px solid #3498db;
-        }}
-        .stage2 {{
+        }
+        .stage2 {
             border-left: 4px solid #9b59b6;
-        }}
-        .stage3 {{
+        }
+        .stage3 {
             border-left: 4px solid #27ae60;
             background: #f0fff0;
-        }}
-        .model-response {{
+        }
+        .model-response {
             background: white;
             padding: 15px;
             margin: 10px 0;
             border-radius: 6px;
             border: 1px solid #e0e0e0;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 15px 0;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 10px;
             text-align: left;
             border-bottom: 1px solid #ddd;
-        }}
-        th {{
+        }
+        th {
             background: #4a90e2;
             color: white;
             font-weight: 600;
-        }}
-        tr:hover {{
+        }
+        tr:hover {
             background: #f5f5f5;
-        }}
-        .separator {{
+        }
+        .separator {
             border-top: 2px solid #ddd;
             margin: 30px 0;
-        }}
-        pre {{
+        }
+        pre {
             background: #f5f5f5;
             padding: 10px;
             border-radius: 4px;
             overflow-x: auto;
-        }}
-        code {{
+        }
+        code {
             background: #f5f5f5;
             padding: 2px 6px;
             border-radius: 3px;
             font-family: 'Courier New', monospace;
-        }}
+        }
     </style>
 </head>
 <body>
-""".format(title=conversation.get('title', 'Conversation')))
+"""
+
+_HTML_SEPARATOR = '<div class="separator"></div>\n'
+
+_HTML_FOOTER = """
+</body>
+</html>
+"""
+
+
+def export_to_markdown(conversation: Dict[str, Any]) -> str:
+    """
+    Export a conversation to Markdown format.
+
+    Args:
+        conversation: Full conversation object with messages
+
+    Returns:
+        Markdown string
+    """
+    return "".join(iter_markdown(conversation))
 
-    # Title and metadata
-    html.append(f"<h1>{conversation.get('title', 'Conversation')}</h1>")
-    html.append('<div class="metadata">')
-    html.append(f"<strong>Date:</strong> {conversation.get('created_at', 'Unknown')}<br>")
-    html.append(f"<strong>ID:</strong> {conversation.get('id', 'Unknown')}")
-    html.append('</div>')
+
+def iter_markdown(conversation: Dict[str, Any]) -> Iterator[str]:
+    """
+    Export a conversation to Markdown, one chunk per message.
+
+    Args:
+        conversation: Full conversation object with messages
+
+    Yields:
+        The document header, then the rendered Markdown of each message
+    """
+    # Header
+    yield (
+        f"# {conversation.get('title', 'Conversation')}\n"
+        "\n"
+        f"**Date:** {conversation.get('created_at', 'Unknown')}\n"
+        f"**ID:** {conversation.get('id', 'Unknown')}\n"
+        "\n"
+        "---\n"
+        "\n"
+    )
 
     # Messages
     for i, msg in enumerate(conversation.get('messages', []), 1):
-        if msg['role'] == 'user':
-            html.append(f'<h2>Message {i}: User</h2>')
-            html.append(f'<div class="user-message">{_escape_html(msg["content"])}</div>')
-
-        elif msg['role'] == 'assistant':
-            html.append(f'<h2>Message {i}: Council Response</h2>')
-            html.append('<div class="assistant-section">')
-
-            # Stage 1
-            stage1 = msg.get('stage1', [])
-            if stage1:
-                html.append('<div class="stage stage1">')
-                html.append('<h3>Stage 1: Individual Responses</h3>')
-                for response in stage1:
-                    model_name = response.get('model', 'Unknown')
-                    model_short = model_name.split('/')[-1] if '/' in model_name else model_name
-                    html.append('<div class="model-response">')
-                    html.append(f'<h4>{model_short}</h4>')
-                    html.append(f'<div>{_format_text_as_html(response.get("response", ""))}</div>')
-                    html.append('</div>')
-                html.append('</div>')
-
-            # Stage 2
-            stage2 = msg.get('stage2', [])
-            metadata = msg.get('metadata', {})
-            if stage2:
-                html.append('<div class="stage stage2">')
-                html.append('<h3>Stage 2: Peer Rankings</h3>')
-
-                # Aggregate rankings
-                aggregate = metadata.get('aggregate_rankings', [])
-                if aggregate:
-                    html.append('<h4>Aggregate Rankings</h4>')
-                    html.append('<table>')
-                    html.append('<tr><th>Rank</th><th>Model</th><th>Avg Score</th><th>Votes</th></tr>')
-                    for idx, agg in enumerate(aggregate, 1):
-                        model_short = agg['model'].split('/')[-1] if '/' in agg['model'] else agg['model']
-                        html.append(f'<tr><td>{idx}</td><td>{model_short}</td><td>{agg["average_rank"]:.2f}</td><td>{agg["rankings_count"]}</td></tr>')
-                    html.append('</table>')
-
-                # Individual rankings
-                for ranking in stage2:
-                    model_name = ranking.get('model', 'Unknown')
-                    model_short = model_name.split('/')[-1] if '/' in model_name else model_name
-                    html.append('<div class="model-response">')
-                    html.append(f'<h4>{model_short}\'s Evaluation</h4>')
-                    html.append(f'<div>{_format_text_as_html(ranking.get("ranking", ""))}</div>')
-                    html.append('</div>')
-                html.append('</div>')
-
-            # Stage 3
-            stage3 = msg.get('stage3', {})
-            if stage3:
-                html.append('<div class="stage stage3">')
-                html.append('<h3>Stage 3: Final Answer</h3>')
-                chairman = stage3.get('model', 'Unknown')
-                chairman_short = chairman.split('/')[-1] if '/' in chairman else chairman
-                html.append(f'<p><strong>Chairman:</strong> {chairman_short}</p>')
-                html.append(f'<div>{_format_text_as_html(stage3.get("response", ""))}</div>')
-                html.append('</div>')
-
-            html.append('</div>')
-
-        html.append('<div class="separator"></div>')
+        yield _markdown_message(i, msg)
+
+
+def _markdown_message(i: int, msg: Dict[str, Any]) -> str:
+    """Render a single message (and its trailing separator) as Markdown."""
+    role = msg['role']
+    if role == 'user':
+        return f"## Message {i}: User\n\n{msg['content']}\n\n---\n\n"
+
+    buf = io.StringIO()
+    w = buf.write
+
+    if role == 'assistant':
+        w(f"## Message {i}: Council Response\n\n")
+
+        # Stage 1: Individual Responses
+        stage1 = msg.get('stage1', [])
+        if stage1:
+            w("### Stage 1: Individual Responses\n\n")
+            for response in stage1:
+                w(f"#### {_short_model(response.get('model', 'Unknown'))}\n\n{response.get('response', '')}\n\n")
+
+        # Stage 2: Peer Rankings
+        stage2 = msg.get('stage2', [])
+        if stage2:
+            w("### Stage 2: Peer Rankings\n\n")
+
+            # Aggregate rankings
+            aggregate = msg.get('metadata', {}).get('aggregate_rankings', [])
+            if aggregate:
+                w(
+                    "#### Aggregate Rankings\n"
+                    "\n"
+                    "| Rank | Model | Avg Score | Votes |\n"
+                    "|------|-------|-----------|-------|\n"
+                )
+                for idx, agg in enumerate(aggregate, 1):
+                    w(f"| {idx} | {_short_model(agg['model'])} | {agg['average_rank']:.2f} | {agg['rankings_count']} |\n")
+                w("\n")
+
+            # Individual rankings
+            for ranking in stage2:
+                w(f"#### {_short_model(ranking.get('model', 'Unknown'))}'s Evaluation\n\n{ranking.get('ranking', '')}\n\n")
+
+        # Stage 3: Final Synthesis
+        stage3 = msg.get('stage3', {})
+        if stage3:
+            w(
+                "### Stage 3: Final Answer\n"
+                "\n"
+                f"**Chairman:** {_short_model(stage3.get('model', 'Unknown'))}\n"
+                "\n"
+                f"{stage3.get('response', '')}\n"
+                "\n"
+            )
+
+    w("---\n\n")
+
+    return buf.getvalue()
+
+
+def export_to_json(conversation: Dict[str, Any], pretty: bool = True) -> str:
+    """
+    Export a conversation to JSON format.
+
+    Args:
+        conversation: Full conversation object with messages
+        pretty: Whether to pretty-print the JSON
+
+    Returns:
+        JSON string
+    """
+    option = orjson.OPT_INDENT_2 if pretty else 0
+    return orjson.dumps(conversation, option=option).decode('utf-8')
+
+
+def iter_json(conversation: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Export a conversation to pretty-printed JSON, one chunk per message.
+
+    The output is byte-for-byte what export_to_json(pretty=True) returns,
+    without building the whole document in memory.
+
+    Args:
+        conversation: Full conversation object with messages
+
+    Yields:
+        UTF-8 encoded JSON fragments
+    """
+    yield b"{"
+    for i, (key, value) in enumerate(conversation.items()):
+        prefix = (b",\n  " if i else b"\n  ") + orjson.dumps(key) + b": "
+        if key == 'messages' and value:
+            yield prefix + b"["
+            for j, msg in enumerate(value):
+                # Re-indent each message for its depth inside the document
+                body = orjson.dumps(msg, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n    ")
+                yield (b",\n    " if j else b"\n    ") + body
+            yield b"\n  ]"
+        else:
+            yield prefix + orjson.dumps(value, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  ")
+    yield b"\n}" if conversation else b"}"
+
+
+def export_to_html(conversation: Dict[str, Any]) -> str:
+    """
+    Export a conversation to HTML format (used for PDF generation).
+
+    Args:
+        conversation: Full conversation object with messages
+
+    Returns:
+        HTML string
+    """
+    return "".join(iter_html(conversation))
+
+
+def iter_html(conversation: Dict[str, Any]) -> Iterator[str]:
+    """
+    Export a conversation to HTML, one chunk per message.
+
+    Args:
+        conversation: Full conversation object with messages
+
+    Yields:
+        The document head, then each message's markup, then the footer
+    """
+    # HTML header with styling, title and metadata
+    title = _escape_html(conversation.get('title', 'Conversation'))
+    yield (
+        f"{_HTML_HEAD_PREFIX}{title}{_HTML_HEAD_SUFFIX}"
+        f"<h1>{title}</h1>\n"
+        '<div class="metadata">\n'
+        f"<strong>Date:</strong> {conversation.get('created_at', 'Unknown')}<br>\n"
+        f"<strong>ID:</strong> {conversation.get('id', 'Unknown')}\n"
+        '</div>\n'
+    )
+
+    # Messages
+    for i, msg in enumerate(conversation.get('messages', []), 1):
+        yield _html_message(i, msg)
 
     # HTML footer
-    html.append("""
-</body>
-</html>
-""")
+    yield _HTML_FOOTER
+
+
+def _html_message(i: int, msg: Dict[str, Any]) -> str:
+    """Render a single message (and its trailing separator) as HTML."""
+    role = msg['role']
+    if role == 'user':
+        return (
+            f'<h2>Message {i}: User</h2>\n'
+            f'<div class="user-message">{_escape_html(msg["content"])}</div>\n'
+            f'{_HTML_SEPARATOR}'
+        )
+
+    buf = io.StringIO()
+    w = buf.write
+
+    if role == 'assistant':
+        w(f'<h2>Message {i}: Council Response</h2>\n<div class="assistant-section">\n')
+
+        # Stage 1
+        stage1 = msg.get('stage1', [])
+        if stage1:
+            w('<div class="stage stage1">\n<h3>Stage 1: Individual Responses</h3>\n')
+            for response in stage1:
+                w(
+                    '<div class="model-response">\n'
+                    f'<h4>{_short_model(response.get("model", "Unknown"))}</h4>\n'
+                    f'<div>{_format_text_as_html(response.get("response", ""))}</div>\n'
+                    '</div>\n'
+                )
+            w('</div>\n')
+
+        # Stage 2
+        stage2 = msg.get('stage2', [])
+        if stage2:
+            w('<div class="stage stage2">\n<h3>Stage 2: Peer Rankings</h3>\n')
+
+            # Aggregate rankings
+            aggregate = msg.get('metadata', {}).get('aggregate_rankings', [])
+            if aggregate:
+                w(
+                    '<h4>Aggregate Rankings</h4>\n'
+                    '<table>\n'
+                    '<tr><th>Rank</th><th>Model</th><th>Avg Score</th><th>Votes</th></tr>\n'
+                )
+                for idx, agg in enumerate(aggregate, 1):
+                    w(f'<tr><td>{idx}</td><td>{_short_model(agg["model"])}</td><td>{agg["average_rank"]:.2f}</td><td>{agg["rankings_count"]}</td></tr>\n')
+                w('</table>\n')
+
+            # Individual rankings
+            for ranking in stage2:
+                w(
+                    '<div class="model-response">\n'
+                    f'<h4>{_short_model(ranking.get("model", "Unknown"))}\'s Evaluation</h4>\n'
+                    f'<div>{_format_text_as_html(ranking.get("ranking", ""))}</div>\n'
+                    '</div>\n'
+                )
+            w('</div>\n')
+
+        # Stage 3
+        stage3 = msg.get('stage3', {})
+        if stage3:
+            w(
+                '<div class="stage stage3">\n'
+                '<h3>Stage 3: Final Answer</h3>\n'
+                f'<p><strong>Chairman:</strong> {_short_model(stage3.get("model", "Unknown"))}</p>\n'
+                f'<div>{_format_text_as_html(stage3.get("response", ""))}</div>\n'
+                '</div>\n'
+            )
+
+        w('</div>\n')
+
+    w(_HTML_SEPARATOR)
+
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=256)
+def _short_model(model_name: str) -> str:
+    """
+    Shorten a model ID for display, memoized across exports.
 
-    return "\n".join(html)
+    "openai/gpt-5.2" becomes "gpt-5.2"; names without a provider prefix are
+    returned unchanged.
+    """
+    return model_name.rsplit('/', 1)[-1]
 
 
 def _escape_html(text: str) -> str:
@@ -331,8 +407,5 @@ def _escape_html(text: str) -> str:
 
 def _format_text_as_html(text: str) -> str:
     """Format text with basic HTML formatting (preserve line breaks)."""
-    # Escape HTML
-    text = _escape_html(text)
-    # Convert line breaks to <br>
-    text = text.replace('\n', '<br>')
-    return text
+    # Escape HTML and convert line breaks to <br>
+    return _escape_html(text).replace('\n', '<br>')
@@ -1,20 +1,28 @@
 """FastAPI backend for LLM Council."""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from fastapi.responses import StreamingResponse
-from typing import List, Dict, Any, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple
+from functools import lru_cache
+from contextlib import asynccontextmanager
+import os
+import time
 import uuid
-import json
 import asyncio
+import concurrent.futures
+
+import orjson
 
 from . import storage
 from . import config
-from .openrouter import fetch_available_models
-from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage2_5_rebuttal, stage3_synthesize_final, calculate_aggregate_rankings
-from .export import export_to_markdown, export_to_json, export_to_html
-from .pricing import estimate_query_cost, format_cost
+from .openrouter import fetch_available_models, get_client, close_client
+from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage2_5_rebuttal, stage3_synthesize_stream, calculate_aggregate_rankings, get_council_config
+from .export import iter_markdown, iter_html, iter_json, export_to_html
+from .pricing import estimate_tokens, calculate_cost, pricing_version, format_cost, calculate_total_stats, warm_encoder
+from .cache import make_council_key, get_council_result, store_council_result
 from .schemas import (
     CreateConversationRequest, 
     SendMessageRequest, 
@@ -24,7 +32,21 @@ from .schemas import (
     Conversation
 )
 
-app = FastAPI(title="LLM Council API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared OpenRouter HTTP client and load the token encoder on startup; close the client and the export pool on shutdown."""
+    global _export_pool
+    get_client()
+    # Loading tiktoken can mean a download; keep it off the loop and off the first estimate
+    await asyncio.to_thread(warm_encoder)
+    yield
+    await close_client()
+    if _export_pool is not None:
+        _export_pool.shutdown(wait=False, cancel_futures=True)
+        _export_pool = None
+
+
+app = FastAPI(title="LLM Council API", lifespan=lifespan)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -35,31 +57,189 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Compress conversation and export payloads. Event streams (SSE and NDJSON)
+# are excluded so events aren't buffered. Level 5 keeps most of the ratio on
+# JSON/Markdown at a fraction of level 9's CPU cost.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + (NDJSON_MEDIA_TYPE,),
+)
+
+
+def sse_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as a Server-Sent Events data frame."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def ndjson_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as one newline-delimited JSON line."""
+    return orjson.dumps(payload) + b"\n"
+
+
+@lru_cache(maxsize=None)
+def beacon(frame: Callable[[Dict[str, Any]], bytes], event_type: str) -> bytes:
+    """Encode a payload-free event (e.g. 'stage1_start') once per framing."""
+    return frame({'type': event_type})
+
+
+def _cached_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata for an answer served from the council cache (nothing was spent)."""
+    return {
+        **metadata,
+        "total_cost": 0.0,
+        "total_tokens": {"prompt": 0, "completion": 0, "total": 0},
+        "cached": True
+    }
+
+
+def _without_thinking(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stream view of a stage 2/3 result without its reasoning trace.
+
+    Only stage 1 thinking is shown while a message streams; the full results
+    are still saved and returned by GET /api/conversations/{id}.
+    """
+    return {key: value for key, value in result.items() if key != 'thinking'}
+
+
+def json_response(payload: Any) -> Response:
+    """
+    Serialize a payload with orjson, bypassing response_model validation.
+
+    Meant for data that storage already returns in the documented shape; the
+    route's response_model then only feeds the OpenAPI schema.
+    """
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
+
+# Curated model list served when the OpenRouter catalog can't be fetched
+_FALLBACK_MODELS = (
+    {
+        "id": "openai/gpt-5.2",
+        "name": "GPT-5.2",
+        "provider": "OpenAI",
+        "description": "Most capable GPT model"
+    },
+    {
+        "id": "anthropic/claude-sonnet-4.5",
+        "name": "Claude Sonnet 4.5",
+        "provider": "Anthropic",
+        "description": "Balanced performance and speed"
+    },
+    {
+        "id": "anthropic/claude-opus-4.5",
+        "name": "Claude Opus 4.5",
+        "provider": "Anthropic",
+        "description": "Most capable Claude model"
+    },
+    {
+        "id": "google/gemini-3-pro-preview",
+        "name": "Gemini 3 Pro",
+        "provider": "Google",
+        "description": "Advanced multimodal model"
+    },
+    {
+        "id": "google/gemini-3-flash-preview",
+        "name": "Gemini 3 Flash",
+        "provider": "Google",
+        "description": "Fast and efficient preview model"
+    },
+    {
+        "id": "x-ai/grok-4.1-fast",
+        "name": "Grok 4.1 Fast",
+        "provider": "xAI",
+        "description": "Fast Grok model"
+    },
+    {
+        "id": "x-ai/grok-4",
+        "name": "Grok 4",
+        "provider": "xAI",
+        "description": "Standard Grok model"
+    },
+    {
+        "id": "deepseek/deepseek-r1",
+        "name": "DeepSeek R1",
+        "provider": "DeepSeek",
+        "description": "Reasoning model with thinking process"
+    },
+    {
+        "id": "nex-agi/deepseek-v3.1-nex-n1:free",
+        "name": "DeepSeek V3.1 Nex-N1 (Free)",
+        "provider": "Nex-AGI",
+        "description": "Free enhanced DeepSeek model"
+    },
+)
+
+# Responses that never change are encoded once at import
+_ROOT_JSON = orjson.dumps({"status": "ok", "service": "LLM Council API"})
+_DELETED_JSON = orjson.dumps({"status": "success", "message": "Conversation deleted"})
+_FALLBACK_MODELS_JSON = orjson.dumps({"models": _FALLBACK_MODELS})
+
+# Seconds an OpenRouter model catalog is reused before it is fetched again
+MODELS_CACHE_TTL = 300.0
+# (fetched_at, encoded response) for the last successful catalog fetch
+_models_cache: Optional[Tuple[float, bytes]] = None
+# Catalog fetch in progress, shared by every request that finds the cache stale
+_models_fetch: Optional[asyncio.Task] = None
+
+
+def _build_config_json() -> bytes:
+    return orjson.dumps({
+        "council_models": config.COUNCIL_MODELS,
+        "chairman_model": config.CHAIRMAN_MODEL,
+        "mode": config.DEFAULT_MODE
+    })
+
+
+# Rebuilt whenever update_config changes the runtime configuration
+_config_json = _build_config_json()
+
+# Serialized conversation list, keyed by its ETag. The prefix keeps tags from
+# different worker processes (each with its own counter) from colliding.
+_ETAG_PREFIX = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+_conversation_list_cache: Dict[str, Any] = {"etag": None, "body": None}
+
+# Conversations at least this long have their HTML export rendered in a
+# worker process; shorter ones stream from a thread in a few milliseconds.
+HTML_EXPORT_OFFLOAD_MESSAGES = 200
+_export_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _get_export_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Lazily create the process pool used for large HTML exports."""
+    global _export_pool
+    if _export_pool is None:
+        _export_pool = concurrent.futures.ProcessPoolExecutor(max_workers=2)
+    return _export_pool
+
 
 
 
 @app.get("/")
 async def root():
     """Health check endpoint."""
-    return {"status": "ok", "service": "LLM Council API"}
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
 
 @app.get("/api/config")
 async def get_config():
     """Get current council configuration."""
-    return {
-        "council_models": config.COUNCIL_MODELS,
-        "chairman_model": config.CHAIRMAN_MODEL,
-        "mode": config.DEFAULT_MODE
-    }
+    return Response(content=_config_json, media_type="application/json")
 
 
 @app.post("/api/config")
 async def update_config(request: ConfigUpdateRequest):
     """Update council configuration."""
+    global _config_json
+
     # Update the runtime configuration
     config.COUNCIL_MODELS = request.council_models
     config.CHAIRMAN_MODEL = request.chairman_model
+    _config_json = _build_config_json()
 
     return {
         "status": "success",
@@ -85,143 +265,171 @@ async def estimate_cost(request: CostEstimateRequest):
 
     # Override if conversation_id is provided
     if request.conversation_id:
-        conversation = storage.get_conversation(request.conversation_id)
+        conversation = await asyncio.to_thread(storage.get_conversation, request.conversation_id)
         if conversation:
             council_models = conversation.get("council_models", council_models)
             chairman_model = conversation.get("chairman_model", chairman_model)
 
-    # Get current council models - Stage 1 + Stage 2 + Stage 3
+    body = _cost_estimate_json(tuple(council_models), chairman_model, estimate_tokens(request.content), pricing_version())
+    return Response(content=body, media_type="application/json")
+
+
+@lru_cache(maxsize=1024)
+def _cost_estimate_json(
+    council_models: Tuple[str, ...],
+    chairman_model: str,
+    prompt_tokens: int,
+    prices_version: int
+) -> bytes:
+    """
+    Build the serialized cost estimate for a council and prompt size.
+
+    The frontend re-estimates on every keystroke, but the estimate only
+    changes with the token count, so most requests are cache hits.
+    prices_version (from pricing_version) keys out estimates made before
+    a price reload.
+    """
+    # Stage 1 and Stage 2 query the council, Stage 3 the chairman
     # Note: Stage 2 and 3 actually have much larger prompts, but this provides a baseline
-    all_models = council_models + council_models + [chairman_model]
+    response_tokens = 500  # Conservative estimate
+    model_costs = {
+        model: calculate_cost(model, prompt_tokens, response_tokens)
+        for model in {*council_models, chairman_model}
+    }
 
-    estimate = estimate_query_cost(
-        all_models,
-        request.content,
-        estimated_response_tokens=500  # Conservative estimate
-    )
+    # Stage 2 sends the same models the same baseline prompt as stage 1
+    council_cost = sum(model_costs[m] for m in council_models)
+    stage3_cost = model_costs[chairman_model]
+    total = round(2 * council_cost + stage3_cost, 4)
 
-    return {
-        "estimated_cost": estimate["total"],
-        "formatted_cost": format_cost(estimate["total"]),
-        "prompt_tokens": estimate["prompt_tokens"],
-        "estimated_response_tokens": estimate["estimated_response_tokens"],
+    return orjson.dumps({
+        "estimated_cost": total,
+        "formatted_cost": format_cost(total),
+        "prompt_tokens": prompt_tokens,
+        "estimated_response_tokens": response_tokens,
         "breakdown": {
-            "stage1_cost": sum(estimate["models"].get(m, 0) for m in council_models),
-            "stage2_cost": sum(estimate["models"].get(m, 0) for m in council_models),
-            "stage3_cost": estimate["models"].get(chairman_model, 0)
+            "stage1_cost": council_cost,
+            "stage2_cost": council_cost,
+            "stage3_cost": stage3_cost
         }
-    }
+    })
 
 
 @app.get("/api/models")
 async def get_available_models():
     """
     Get list of available models.
-    Fetches from OpenRouter API, falling back to curated list on error.
+    Fetches from OpenRouter API (reused for MODELS_CACHE_TTL seconds), falling
+    back to curated list on error.
     """
-    # Try fetching from OpenRouter
-    models = await fetch_available_models()
-    
-    if models:
-        return {"models": models}
+    global _models_fetch
+    if _models_cache is not None and time.monotonic() - _models_cache[0] < MODELS_CACHE_TTL:
+        return Response(content=_models_cache[1], media_type="application/json")
+
+    # Try fetching from OpenRouter; concurrent callers wait on the same fetch
+    if _models_fetch is None or _models_fetch.done():
+        _models_fetch = asyncio.ensure_future(_refresh_models_cache())
+    # Shielded so one caller cancelling doesn't fail the others
+    body = await asyncio.shield(_models_fetch)
+
+    if body is not None:
+        return Response(content=body, media_type="application/json")
 
     # Fallback list if API fails
-    models = [
-        {
-            "id": "openai/gpt-5.2",
-            "name": "GPT-5.2",
-            "provider": "OpenAI",
-            "description": "Most capable GPT model"
-        },
-        {
-            "id": "anthropic/claude-sonnet-4.5",
-            "name": "Claude Sonnet 4.5",
-            "provider": "Anthropic",
-            "description": "Balanced performance and speed"
-        },
-        {
-            "id": "anthropic/claude-opus-4.5",
-            "name": "Claude Opus 4.5",
-            "provider": "Anthropic",
-            "description": "Most capable Claude model"
-        },
-        {
-            "id": "google/gemini-3-pro-preview",
-            "name": "Gemini 3 Pro",
-            "provider": "Google",
-            "description": "Advanced multimodal model"
-        },
-        {
-            "id": "google/gemini-3-flash-preview",
-            "name": "Gemini 3 Flash",
-            "provider": "Google",
-            "description": "Fast and efficient preview model"
-        },
-        {
-            "id": "x-ai/grok-4.1-fast",
-            "name": "Grok 4.1 Fast",
-            "provider": "xAI",
-            "description": "Fast Grok model"
-        },
-        {
-            "id": "x-ai/grok-4",
-            "name": "Grok 4",
-            "provider": "xAI",
-            "description": "Standard Grok model"
-        },
-        {
-            "id": "deepseek/deepseek-r1",
-            "name": "DeepSeek R1",
-            "provider": "DeepSeek",
-            "description": "Reasoning model with thinking process"
-        },
-        {
-            "id": "nex-agi/deepseek-v3.1-nex-n1:free",
-            "name": "DeepSeek V3.1 Nex-N1 (Free)",
-            "provider": "Nex-AGI",
-            "description": "Free enhanced DeepSeek model"
-        }
-    ]
+    return Response(content=_FALLBACK_MODELS_JSON, media_type="application/json")
 
-    return {"models": models}
+
+async def _refresh_models_cache() -> Optional[bytes]:
+    """Fetch the OpenRouter catalog and cache its encoded response (None on failure)."""
+    global _models_cache
+    models = await fetch_available_models()
+    if not models:
+        return None
+
+    _models_cache = (time.monotonic(), orjson.dumps({"models": models}))
+    return _models_cache[1]
 
 
 @app.get("/api/conversations", response_model=List[ConversationMetadata])
-async def list_conversations():
-    """List all conversations (metadata only)."""
-    return storage.list_conversations()
+async def list_conversations(http_request: Request):
+    """
+    List all conversations (metadata only).
+
+    The serialized list is cached until storage changes and tagged with an
+    ETag, so unchanged sidebar refreshes get a bodiless 304.
+    """
+    etag = f'W/"{_ETAG_PREFIX}-{storage.list_version()}"'
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if _conversation_list_cache["etag"] != etag:
+        conversations = await asyncio.to_thread(storage.list_conversations)
+        _conversation_list_cache["body"] = orjson.dumps(conversations)
+        _conversation_list_cache["etag"] = etag
+
+    return Response(
+        content=_conversation_list_cache["body"],
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
 
 
 @app.post("/api/conversations", response_model=Conversation)
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
     conversation_id = str(uuid.uuid4())
-    conversation = storage.create_conversation(
+    conversation = await asyncio.to_thread(
+        storage.create_conversation,
         conversation_id,
         council_models=request.council_models,
         chairman_model=request.chairman_model,
         model_personas=request.model_personas,
         mode=request.mode
     )
-    return conversation
+    return json_response(conversation)
 
 
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
 async def get_conversation(conversation_id: str):
     """Get a specific conversation with all its messages."""
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await asyncio.to_thread(storage.get_conversation, conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return conversation
+    return json_response(conversation)
 
 
 @app.delete("/api/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
-    success = storage.delete_conversation(conversation_id)
+    success = await asyncio.to_thread(storage.delete_conversation, conversation_id)
     if not success:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return {"status": "success", "message": "Conversation deleted"}
+    return Response(content=_DELETED_JSON, media_type="application/json")
+
+
+def _filename_char(char: str) -> str:
+    """Keep alphanumerics, '-' and '_'; map spaces and everything else to '_'."""
+    return char if char.isalnum() or char in '-_' else '_'
+
+
+class _FilenameTable(dict):
+    """
+    str.translate table for filenames, precomputed for ASCII.
+
+    Other characters are classified on lookup without being stored, so
+    arbitrary Unicode titles can't grow the table.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        return _filename_char(chr(codepoint))
+
+
+_FILENAME_TABLE = _FilenameTable((codepoint, _filename_char(chr(codepoint))) for codepoint in range(128))
+
+
+def safe_filename(title: str) -> str:
+    """Turn a conversation title into a download filename stem (at most 50 characters)."""
+    return title[:50].translate(_FILENAME_TABLE)
 
 
 @app.get("/api/conversations/{conversation_id}/export")
@@ -229,6 +437,10 @@ async def export_conversation(conversation_id: str, format: str = "markdown"):
     """
     Export a conversation in various formats.
 
+    Markdown, JSON and HTML come from sync generators that StreamingResponse
+    iterates in its threadpool, and very long HTML exports render in a worker
+    process, so no export renders on the event loop.
+
     Args:
         conversation_id: The conversation ID
         format: Export format (markdown, json, html)
@@ -236,21 +448,17 @@ async def export_conversation(conversation_id: str, format: str = "markdown"):
     Returns:
         File download with appropriate content type
     """
-    from fastapi.responses import Response
-
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await asyncio.to_thread(storage.get_conversation, conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Sanitize title for filename
     title = conversation.get('title', 'conversation')
-    safe_title = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in title)
-    safe_title = safe_title.replace(' ', '_')[:50]  # Limit length
+    safe_title = safe_filename(title)
 
     if format == "markdown" or format == "md":
-        content = export_to_markdown(conversation)
-        return Response(
-            content=content,
+        return StreamingResponse(
+            iter_markdown(conversation),
             media_type="text/markdown",
             headers={
                 "Content-Disposition": f'attachment; filename="{safe_title}.md"'
@@ -258,9 +466,8 @@ async def export_conversation(conversation_id: str, format: str = "markdown"):
         )
 
     elif format == "json":
-        content = export_to_json(conversation, pretty=True)
-        return Response(
-            content=content,
+        return StreamingResponse(
+            iter_json(conversation),
             media_type="application/json",
             headers={
                 "Content-Disposition": f'attachment; filename="{safe_title}.json"'
@@ -268,33 +475,35 @@ async def export_conversation(conversation_id: str, format: str = "markdown"):
         )
 
     elif format == "html":
-        content = export_to_html(conversation)
-        return Response(
-            content=content,
+        headers = {
+            "Content-Disposition": f'attachment; filename="{safe_title}.html"'
+        }
+        if len(conversation.get("messages", [])) >= HTML_EXPORT_OFFLOAD_MESSAGES:
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(_get_export_pool(), export_to_html, conversation)
+            return Response(content=content, media_type="text/html", headers=headers)
+
+        return StreamingResponse(
+            iter_html(conversation),
             media_type="text/html",
-            headers={
-                "Content-Disposition": f'attachment; filename="{safe_title}.html"'
-            }
+            headers=headers
         )
 
     else:
         raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Use 'markdown', 'json', or 'html'.")
 
 
-@app.post("/api/conversations/{conversation_id}/message")
-async def send_message(conversation_id: str, request: SendMessageRequest):
+async def _add_user_message(conversation_id: str, request: SendMessageRequest) -> Tuple[Dict[str, Any], bool]:
     """
-    Send a message and run the 3-stage council process.
-    Returns the complete response with all stages.
-    """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    Append the user's message (with any attachments) to a conversation.
 
-    # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
+    Args:
+        conversation_id: The conversation ID
+        request: The incoming message
 
+    Returns:
+        Tuple of (updated conversation, whether this is its first message)
+    """
     # Process attachments if present
     full_content = request.content
     if request.attachments:
@@ -303,33 +512,69 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
             content = attachment.get("content", "")
             full_content += f"\n\n---\n**Attached File:** {name}\n\n```\n{content}\n```\n---"
 
-    # Add user message
-    storage.add_user_message(conversation_id, full_content)
+    # One read-modify-write; the returned conversation includes the new message
+    try:
+        conversation = await asyncio.to_thread(storage.add_user_message, conversation_id, full_content)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    return conversation, len(conversation["messages"]) == 1
+
+
+@app.post("/api/conversations/{conversation_id}/message")
+async def send_message(conversation_id: str, request: SendMessageRequest):
+    """
+    Send a message and run the 3-stage council process.
+    Returns the complete response with all stages.
+    """
+    updated_conversation, is_first_message = await _add_user_message(conversation_id, request)
 
-    # If this is the first message, generate a title
+    # Start title generation in parallel with the council (don't await yet)
+    title_task = None
     if is_first_message:
-        title = await generate_conversation_title(request.content)
-        storage.update_conversation_title(conversation_id, title)
-
-    # Run the 3-stage council process
-    # Re-fetch conversation to get full history including the new user message
-    updated_conversation = storage.get_conversation(conversation_id)
-    
-    from .council import get_council_config
-    council_models, chairman_model, model_personas = await get_council_config(
-        updated_conversation, 
-        request.content
-    )
-    
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
-        updated_conversation["messages"],
-        council_models,
-        chairman_model,
-        model_personas
-    )
+        title_task = asyncio.create_task(generate_conversation_title(request.content))
+
+    try:
+        # Run the 3-stage council process
+
+        council_models, chairman_model, model_personas = await get_council_config(
+            updated_conversation, 
+            request.content
+        )
+
+        # Reuse the council's answer to a repeated prompt
+        messages = updated_conversation["messages"]
+        cache_key = make_council_key(messages, council_models, chairman_model, model_personas)
+        cached = get_council_result(cache_key)
+        if cached:
+            stage1_results, stage2_results, stage3_result = cached["stage1"], cached["stage2"], cached["stage3"]
+            metadata = _cached_metadata(cached["metadata"])
+        else:
+            stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
+                messages,
+                council_models,
+                chairman_model,
+                model_personas
+            )
+            store_council_result(cache_key, messages, {
+                "stage1": stage1_results,
+                "stage2": stage2_results,
+                "stage3": stage3_result,
+                "metadata": metadata
+            })
+
+        # Wait for title generation if it was started
+        if title_task:
+            title = await title_task
+            await asyncio.to_thread(storage.update_conversation_title, conversation_id, title)
+    finally:
+        # Don't leave title generation running if the council failed or the request was cancelled
+        if title_task is not None and not title_task.done():
+            title_task.cancel()
 
     # Add assistant message with all stages
-    storage.add_assistant_message(
+    await asyncio.to_thread(
+        storage.add_assistant_message,
         conversation_id,
         stage1_results,
         stage2_results,
@@ -338,106 +583,163 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     )
 
     # Return the complete response with metadata
-    return {
+    return json_response({
         "stage1": stage1_results,
         "stage2": stage2_results,
         "stage3": stage3_result,
         "metadata": metadata
-    }
+    })
+
+
+# How often a running council stage checks whether the streaming client left (seconds)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class _ClientDisconnected(Exception):
+    """The streaming client went away while the council was running."""
+
+
+async def _unless_disconnected(http_request: Request, stage: Awaitable[Any]) -> Any:
+    """
+    Await a council stage, cancelling it as soon as the client disconnects.
+
+    Args:
+        http_request: The streaming request to watch
+        stage: Awaitable running one council stage
+
+    Returns:
+        The stage's result
+
+    Raises:
+        _ClientDisconnected: If the client left before or as the stage finished
+    """
+    task = asyncio.ensure_future(stage)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if await http_request.is_disconnected():
+                raise _ClientDisconnected()
+            if done:
+                return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
 
 
 @app.post("/api/conversations/{conversation_id}/message/stream")
-async def send_message_stream(conversation_id: str, request: SendMessageRequest):
+async def send_message_stream(conversation_id: str, request: SendMessageRequest, http_request: Request):
     """
     Send a message and stream the 3-stage council process.
-    Returns Server-Sent Events as each stage completes.
+    Returns Server-Sent Events as each stage completes, or newline-delimited
+    JSON when the client sends `Accept: application/x-ndjson`.
+    Stops early (cancelling the running stage and title generation, and
+    discarding the unanswered user message) if the client disconnects.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    # Saved before streaming starts so a missing conversation is still a 404
+    updated_conversation, is_first_message = await _add_user_message(conversation_id, request)
 
-    # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
+    # Pick the event framing once per request
+    if NDJSON_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        frame, media_type = ndjson_event, NDJSON_MEDIA_TYPE
+    else:
+        frame, media_type = sse_event, "text/event-stream"
 
     async def event_generator():
+        title_task = None
         try:
-            # Process attachments if present
-            full_content = request.content
-            if request.attachments:
-                for attachment in request.attachments:
-                    name = attachment.get("name", "Unknown File")
-                    content = attachment.get("content", "")
-                    full_content += f"\n\n---\n**Attached File:** {name}\n\n```\n{content}\n```\n---"
-
-            # Add user message
-            storage.add_user_message(conversation_id, full_content)
-            
-            # Re-fetch conversation to get full history
-            updated_conversation = storage.get_conversation(conversation_id)
             messages = updated_conversation["messages"]
-            
-            from .council import get_council_config
+
+            # Start title generation in parallel (don't await yet), so it
+            # overlaps persona resolution as well as the council
+            if is_first_message:
+                title_task = asyncio.create_task(generate_conversation_title(request.content))
+
             # Send persona resolution event if needed
             if updated_conversation.get("mode") != "standard" and not updated_conversation.get("model_personas"):
-                yield f"data: {json.dumps({'type': 'resolving_personas'})}\n\n"
+                yield beacon(frame, 'resolving_personas')
 
             council_models, chairman_model, model_personas = await get_council_config(
                 updated_conversation, 
                 request.content
             )
 
-            # Start title generation in parallel (don't await yet)
-            title_task = None
-            if is_first_message:
-                title_task = asyncio.create_task(generate_conversation_title(request.content))
-
-            # Stage 1: Collect responses (now uses full history)
-            yield f"data: {json.dumps({'type': 'stage1_start'})}\n\n"
-            stage1_results = await stage1_collect_responses(messages, council_models, model_personas)
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
-
-            # Stage 2: Collect rankings (still focuses on latest response evaluation)
-            yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
-            stage2_results, label_to_model = await stage2_collect_rankings(request.content, stage1_results, council_models, model_personas)
-            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
-
-            # Stage 2.5: Rebuttal Round
-            yield f"data: {json.dumps({'type': 'stage2_5_start'})}\n\n"
-            stage2_5_results = await stage2_5_rebuttal(
-                request.content,
-                stage1_results,
-                stage2_results,
-                label_to_model,
-                model_personas
-            )
-            # Re-emit stage1_complete with updated results so UI updates
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage2_5_results})}\n\n"
-
-            # Stage 3: Synthesize final answer
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
-            stage3_result = await stage3_synthesize_final(request.content, stage2_5_results, stage2_results, chairman_model, model_personas)
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
+            # Reuse the council's answer to a repeated prompt
+            cache_key = make_council_key(messages, council_models, chairman_model, model_personas)
+            cached = get_council_result(cache_key)
+            if cached:
+                stage1_results, stage2_results, stage3_result = cached["stage1"], cached["stage2"], cached["stage3"]
+                metadata = _cached_metadata(cached["metadata"])
+                label_to_model = metadata["label_to_model"]
+                aggregate_rankings = metadata["aggregate_rankings"]
+                yield (
+                    frame({'type': 'stage1_complete', 'data': stage1_results})
+                    + frame({'type': 'stage2_complete', 'data': [_without_thinking(r) for r in stage2_results], 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})
+                    + frame({'type': 'stage3_complete', 'data': _without_thinking(stage3_result)})
+                )
+            else:
+                # Stage 1: Collect responses (now uses full history)
+                yield beacon(frame, 'stage1_start')
+                stage1_results = await _unless_disconnected(
+                    http_request, stage1_collect_responses(messages, council_models, model_personas)
+                )
+
+                # Stage 2: Collect rankings (still focuses on latest response evaluation)
+                # Each start beacon goes out in the same write as the preceding result
+                yield frame({'type': 'stage1_complete', 'data': stage1_results}) + beacon(frame, 'stage2_start')
+                stage2_results, label_to_model = await _unless_disconnected(
+                    http_request, stage2_collect_rankings(request.content, stage1_results, council_models, model_personas)
+                )
+                aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+
+                # Stage 2.5: Rebuttal Round
+                yield (
+                    frame({'type': 'stage2_complete', 'data': [_without_thinking(r) for r in stage2_results], 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})
+                    + beacon(frame, 'stage2_5_start')
+                )
+                stage2_5_results = await _unless_disconnected(http_request, stage2_5_rebuttal(
+                    request.content,
+                    stage1_results,
+                    stage2_results,
+                    label_to_model,
+                    model_personas
+                ))
+
+                # The revised answers are what gets cached and saved, as in run_full_council
+                stage1_results = stage2_5_results
+
+                # Stage 3: Synthesize final answer
+                # Re-emit stage1_complete with updated results so UI updates
+                yield frame({'type': 'stage1_complete', 'data': stage2_5_results}) + beacon(frame, 'stage3_start')
+                async for event in stage3_synthesize_stream(request.content, stage2_5_results, stage2_results, chairman_model, model_personas):
+                    if 'delta' in event:
+                        yield frame({'type': 'stage3_delta', 'model': chairman_model, 'delta': event['delta']})
+                    else:
+                        stage3_result = event['result']
+                yield frame({'type': 'stage3_complete', 'data': _without_thinking(stage3_result)})
+
+                stats = calculate_total_stats(stage2_5_results, stage2_results, stage3_result)
+                metadata = {
+                    "label_to_model": label_to_model,
+                    "aggregate_rankings": aggregate_rankings,
+                    "total_cost": stats["total_cost"],
+                    "total_tokens": stats["total_tokens"]
+                }
+                store_council_result(cache_key, messages, {
+                    "stage1": stage1_results,
+                    "stage2": stage2_results,
+                    "stage3": stage3_result,
+                    "metadata": metadata
+                })
 
             # Wait for title generation if it was started
             if title_task:
                 title = await title_task
-                storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
+                await asyncio.to_thread(storage.update_conversation_title, conversation_id, title)
+                yield frame({'type': 'title_complete', 'data': {'title': title}})
 
             # Save complete assistant message
-            from .pricing import calculate_total_stats
-            stats = calculate_total_stats(stage2_5_results, stage2_results, stage3_result)
-
-            metadata = {
-                "label_to_model": label_to_model,
-                "aggregate_rankings": aggregate_rankings,
-                "total_cost": stats["total_cost"],
-                "total_tokens": stats["total_tokens"]
-            }
-
-            storage.add_assistant_message(
+            await asyncio.to_thread(
+                storage.add_assistant_message,
                 conversation_id,
                 stage1_results,
                 stage2_results,
@@ -446,15 +748,24 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
             )
 
             # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield beacon(frame, 'complete')
+
+        except _ClientDisconnected:
+            # Nobody will read the answer; don't leave the question unanswered in the history
+            await asyncio.to_thread(storage.discard_unanswered_message, conversation_id)
 
         except Exception as e:
             # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield frame({'type': 'error', 'message': str(e)})
+
+        finally:
+            # Don't leave title generation running for a client that went away
+            if title_task is not None and not title_task.done():
+                title_task.cancel()
 
     return StreamingResponse(
         event_generator(),
-        media_type="text/event-stream",
+        media_type=media_type,
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
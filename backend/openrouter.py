@@ -1,10 +1,204 @@
 """OpenRouter API client for making LLM requests."""
 
+import asyncio
+import functools
 import json
+import random
 import httpx
-from typing import List, Dict, Any, Optional
-from .config import OPENROUTER_API_KEY, OPENROUTER_API_URL, OPENROUTER_MODELS_URL
+import orjson
+from typing import List, Dict, Any, Optional, AsyncIterator
+from .config import (
+    OPENROUTER_API_KEY,
+    OPENROUTER_API_URL,
+    OPENROUTER_MODELS_URL,
+    MAX_RETRIES,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    PROVIDER_CONCURRENCY,
+    MAX_CONCURRENT_REQUESTS,
+)
 from .reasoning import get_model_timeout, parse_reasoning_response, is_reasoning_model
+from .cache import cached_llm
+
+# HTTP statuses worth retrying (timeouts, conflicts, rate limits, upstream/gateway errors)
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 524}
+
+# Error message fragments that indicate a transient provider problem
+RETRYABLE_MESSAGES = ("overload", "timeout", "gateway", "temporarily rate-limited", "missing field")
+
+
+# Connection pool shared by every OpenRouter request. A council round fans out
+# N+N+1 requests, so the pool is sized well above that to avoid queueing.
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Chat completion headers are the same for every request
+API_HEADERS = {
+    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+    "Content-Type": "application/json",
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Every provider shares the pool above, so each gets its own cap on in-flight
+# requests to stop one slow upstream from holding all the connections. An
+# overall cap keeps concurrent councils under the API key's rate limit.
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+_request_semaphore: Optional[asyncio.Semaphore] = None
+_semaphores_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide HTTP client, creating it on first use.
+
+    Reusing one client keeps TLS connections alive across requests and
+    council stages. A client is tied to the event loop it was created on, so a
+    new one is made if the loop changed (e.g. between test runs).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        _client_loop = loop
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client (called on application shutdown)."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client, _client_loop = None, None
+
+
+def _bind_semaphores():
+    """Recreate the limiters if the event loop changed (e.g. between test runs)."""
+    global _provider_semaphores, _request_semaphore, _semaphores_loop
+    loop = asyncio.get_running_loop()
+    if _semaphores_loop is not loop:
+        _provider_semaphores = {}
+        _request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        _semaphores_loop = loop
+
+
+def request_semaphore() -> asyncio.Semaphore:
+    """Return the process-wide limiter on in-flight OpenRouter requests."""
+    _bind_semaphores()
+    return _request_semaphore
+
+
+def provider_semaphore(model: str) -> asyncio.Semaphore:
+    """
+    Return the concurrency limiter for a model's upstream provider.
+
+    Args:
+        model: OpenRouter model identifier (e.g., "openai/gpt-4o")
+
+    Returns:
+        Semaphore shared by every model with the same ID prefix
+    """
+    _bind_semaphores()
+    provider = model.split('/', 1)[0]
+    semaphore = _provider_semaphores.get(provider)
+    if semaphore is None:
+        semaphore = _provider_semaphores[provider] = asyncio.Semaphore(PROVIDER_CONCURRENCY)
+    return semaphore
+
+
+class RecoverableError(Exception):
+    """A transient OpenRouter failure that is worth retrying."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class UnrecoverableError(Exception):
+    """An OpenRouter failure that will not succeed on retry."""
+
+
+def classify_error(error: Exception) -> Exception:
+    """
+    Classify an exception raised while querying OpenRouter.
+
+    Args:
+        error: The raised exception
+
+    Returns:
+        RecoverableError or UnrecoverableError wrapping the original error
+    """
+    if isinstance(error, (RecoverableError, UnrecoverableError)):
+        return error
+
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status in RETRYABLE_STATUSES:
+            retry_after = None
+            header = error.response.headers.get("Retry-After")
+            if header:
+                try:
+                    retry_after = float(header)
+                except ValueError:
+                    pass
+            return RecoverableError(str(error), status=status, retry_after=retry_after)
+        return UnrecoverableError(str(error))
+
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return RecoverableError(str(error))
+
+    # Malformed payloads (e.g. missing 'choices') are usually a provider hiccup
+    if isinstance(error, (KeyError, IndexError, json.JSONDecodeError)):
+        return RecoverableError(f"Malformed response, missing field: {error}")
+
+    message = str(error).lower()
+    if any(fragment in message for fragment in RETRYABLE_MESSAGES):
+        return RecoverableError(str(error))
+
+    return UnrecoverableError(str(error))
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff delay with jitter for a retry attempt.
+
+    Args:
+        attempt: Zero-based retry attempt
+        retry_after: Server-requested minimum delay (Retry-After header)
+
+    Returns:
+        Delay in seconds
+    """
+    delay = min(RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.uniform(0, 0.5)), RETRY_MAX_DELAY)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def retry_transient(func):
+    """
+    Retry an async `(model, ...)` call on recoverable errors with exponential backoff.
+
+    Unrecoverable errors, and recoverable ones after MAX_RETRIES, are re-raised.
+    """
+    @functools.wraps(func)
+    async def wrapper(model: str, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return await func(model, *args, **kwargs)
+            except Exception as e:
+                error = classify_error(e)
+                if not isinstance(error, RecoverableError) or attempt >= MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt, error.retry_after)
+                print(f"Retrying model {model} (attempt {attempt + 1}/{MAX_RETRIES}, status {error.status}) in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    return wrapper
 
 
 async def fetch_available_models() -> List[Dict[str, str]]:
@@ -15,30 +209,29 @@ async def fetch_available_models() -> List[Dict[str, str]]:
         List of model dicts with id, name, provider, description
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(OPENROUTER_MODELS_URL)
-            response.raise_for_status()
-            
-            data = response.json()
-            models_data = data.get('data', [])
-            
-            formatted_models = []
-            for model in models_data:
-                # Derive provider from ID (e.g. "anthropic/claude" -> "Anthropic")
-                model_id = model.get('id', '')
-                provider = model_id.split('/')[0].capitalize() if '/' in model_id else 'Unknown'
-                
-                formatted_models.append({
-                    "id": model_id,
-                    "name": model.get('name', model_id),
-                    "provider": provider,
-                    "description": model.get('description', '')
-                })
-                
-            # Sort by name
-            formatted_models.sort(key=lambda x: x['name'])
-            
-            return formatted_models
+        response = await get_client().get(OPENROUTER_MODELS_URL, timeout=10.0)
+        response.raise_for_status()
+
+        data = orjson.loads(response.content)
+        models_data = data.get('data', [])
+
+        formatted_models = []
+        for model in models_data:
+            # Derive provider from ID (e.g. "anthropic/claude" -> "Anthropic")
+            model_id = model.get('id', '')
+            provider = model_id.split('/')[0].capitalize() if '/' in model_id else 'Unknown'
+
+            formatted_models.append({
+                "id": model_id,
+                "name": model.get('name', model_id),
+                "provider": provider,
+                "description": model.get('description', '')
+            })
+
+        # Sort by name
+        formatted_models.sort(key=lambda x: x['name'])
+
+        return formatted_models
 
     except httpx.HTTPError as e:
         print(f"HTTP error fetching models: {e}")
@@ -51,6 +244,58 @@ async def fetch_available_models() -> List[Dict[str, str]]:
         return []
 
 
+@retry_transient
+async def _post_chat_completion(
+    model: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float
+) -> Dict[str, Any]:
+    """POST a chat completion request and return the decoded, validated body."""
+    # Held per attempt, so retry backoff doesn't occupy a slot
+    async with request_semaphore(), provider_semaphore(model):
+        response = await get_client().post(
+            OPENROUTER_API_URL,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
+    response.raise_for_status()
+
+    data = orjson.loads(response.content)
+    # Validate the shape here so malformed payloads are retried
+    data['choices'][0]['message']
+    return data
+
+
+def _format_completion(message: Dict[str, Any], usage: Dict[str, int], reasoning: bool) -> Dict[str, Any]:
+    """Shape a completion message and its usage into query_model's response dict."""
+    # Get content
+    content = message.get('content', '')
+
+    # Parse reasoning if it's a reasoning model
+    thinking = ""
+    answer = content
+
+    if reasoning:
+        parsed = parse_reasoning_response(content)
+        thinking = parsed['thinking']
+        answer = parsed['answer']
+
+    return {
+        'content': answer,  # Final answer without thinking tags
+        'thinking': thinking,  # Extracted thinking process
+        'reasoning_details': message.get('reasoning_details'),
+        'is_reasoning_model': reasoning,
+        'usage': {
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'completion_tokens': usage.get('completion_tokens', 0),
+            'total_tokens': usage.get('total_tokens', 0)
+        }
+    }
+
+
+@cached_llm
 async def query_model(
     model: str,
     messages: List[Dict[str, str]],
@@ -61,64 +306,27 @@ async def query_model(
 
     Args:
         model: OpenRouter model identifier (e.g., "openai/gpt-4o")
-        messages: List of message dicts with 'role' and 'content'
+        messages: List of message dicts with 'role' and 'content' (never mutated,
+            so callers may share one list across concurrent queries)
         timeout: Request timeout in seconds
 
     Returns:
         Response dict with 'content' and optional 'reasoning_details', or None if failed
     """
+    reasoning = is_reasoning_model(model)
+
     # Use model-specific timeout if not provided
     if timeout is None:
         timeout = get_model_timeout(model)
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
     payload = {
         "model": model,
         "messages": messages,
     }
 
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            message = data['choices'][0]['message']
-
-            # Extract token usage
-            usage = data.get('usage', {})
-
-            # Get content
-            content = message.get('content', '')
-
-            # Parse reasoning if it's a reasoning model
-            thinking = ""
-            answer = content
-
-            if is_reasoning_model(model):
-                parsed = parse_reasoning_response(content)
-                thinking = parsed['thinking']
-                answer = parsed['answer']
-
-            return {
-                'content': answer,  # Final answer without thinking tags
-                'thinking': thinking,  # Extracted thinking process
-                'reasoning_details': message.get('reasoning_details'),
-                'is_reasoning_model': is_reasoning_model(model),
-                'usage': {
-                    'prompt_tokens': usage.get('prompt_tokens', 0),
-                    'completion_tokens': usage.get('completion_tokens', 0),
-                    'total_tokens': usage.get('total_tokens', 0)
-                }
-            }
+        data = await _post_chat_completion(model, API_HEADERS, payload, timeout)
+        return _format_completion(data['choices'][0]['message'], data.get('usage', {}), reasoning)
 
     except httpx.HTTPError as e:
         print(f"HTTP error querying model {model}: {e}")
@@ -126,7 +334,7 @@ async def query_model(
             'error': f"HTTP Error: {str(e)}",
             'content': f"Error: {str(e)}",
             'thinking': "",
-            'is_reasoning_model': is_reasoning_model(model),
+            'is_reasoning_model': reasoning,
             'usage': {}
         }
     except Exception as e:
@@ -135,11 +343,88 @@ async def query_model(
             'error': str(e),
             'content': f"Error: {str(e)}",
             'thinking': "",
-            'is_reasoning_model': is_reasoning_model(model),
+            'is_reasoning_model': reasoning,
             'usage': {}
         }
 
 
+async def stream_model(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: Optional[float] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Query a single model with streaming, yielding its answer as it arrives.
+
+    If the stream fails before any text arrives, the request is repeated
+    through query_model (with its retries); a failure mid-answer ends with
+    an error response like query_model's.
+
+    Args:
+        model: OpenRouter model identifier (e.g., "openai/gpt-4o")
+        messages: List of message dicts with 'role' and 'content'
+        timeout: Request timeout in seconds
+
+    Yields:
+        {'delta': text} chunks, then {'response': <query_model response dict>}
+    """
+    reasoning = is_reasoning_model(model)
+    if timeout is None:
+        timeout = get_model_timeout(model)
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    parts: List[str] = []
+    usage: Dict[str, int] = {}
+
+    try:
+        async with request_semaphore(), provider_semaphore(model):
+            async with get_client().stream(
+                "POST", OPENROUTER_API_URL, headers=API_HEADERS, json=payload, timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Skip keep-alive comments and blank separators
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+
+                    chunk = orjson.loads(data)
+                    if 'error' in chunk:
+                        raise RuntimeError(chunk['error'].get('message', chunk['error']))
+                    usage = chunk.get('usage') or usage
+
+                    choices = chunk.get('choices')
+                    delta = choices[0].get('delta', {}).get('content') if choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield {'delta': delta}
+
+    except Exception as e:
+        if not parts:
+            print(f"Streaming failed for model {model}, retrying without streaming: {e}")
+            yield {'response': await query_model(model, messages, timeout)}
+            return
+
+        print(f"Stream interrupted for model {model}: {e}")
+        yield {'response': {
+            'error': str(e),
+            'content': f"Error: {str(e)}",
+            'thinking': "",
+            'is_reasoning_model': reasoning,
+            'usage': {}
+        }}
+        return
+
+    yield {'response': _format_completion({'content': "".join(parts)}, usage, reasoning)}
+
+
 async def query_models_parallel(
     models: List[str],
     messages: List[Dict[str, str]]
@@ -154,8 +439,6 @@ async def query_models_parallel(
     Returns:
         Dict mapping model identifier to response dict (or None if failed)
     """
-    import asyncio
-
     # Create tasks for all models
     tasks = [query_model(model, messages) for model in models]
 
@@ -163,4 +446,4 @@ async def query_models_parallel(
     responses = await asyncio.gather(*tasks)
 
     # Map models to their responses
-    return {model: response for model, response in zip(models, responses)}
+    return dict(zip(models, responses))
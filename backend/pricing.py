@@ -1,6 +1,11 @@
 """Model pricing and cost calculation utilities."""
 
-from typing import Dict, Optional, List, Any
+from collections import Counter
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, Optional, List, Any, Tuple
 
 # OpenRouter pricing (per million tokens) as of 2025
 # Updated pricing - check https://openrouter.ai/models for latest
@@ -63,6 +68,32 @@ def get_model_pricing(model_id: str) -> Dict[str, float]:
     return MODEL_PRICING.get(model_id, DEFAULT_PRICING)
 
 
+# (prompt, completion) price pairs flattened once from MODEL_PRICING
+_PRICE_PAIRS: Dict[str, Tuple[float, float]] = {}
+_DEFAULT_PRICE_PAIR = (DEFAULT_PRICING["prompt"], DEFAULT_PRICING["completion"])
+
+# Bumped on every reload so callers caching derived values can revalidate
+_pricing_version = 0
+
+
+def pricing_version() -> int:
+    """Return a counter that changes whenever prices are reloaded."""
+    return _pricing_version
+
+
+def reload_pricing():
+    """Rebuild the flattened price table and drop memoized costs after MODEL_PRICING changes."""
+    global _pricing_version
+    _pricing_version += 1
+    _PRICE_PAIRS.clear()
+    _PRICE_PAIRS.update(
+        (model_id, (pricing["prompt"], pricing["completion"]))
+        for model_id, pricing in MODEL_PRICING.items()
+    )
+    calculate_cost.cache_clear()
+
+
+@lru_cache(maxsize=4096)
 def calculate_cost(
     model_id: str,
     prompt_tokens: int,
@@ -71,6 +102,9 @@ def calculate_cost(
     """
     Calculate the cost for a specific API call.
 
+    Results are memoized; call `reload_pricing()` after changing
+    MODEL_PRICING at runtime.
+
     Args:
         model_id: OpenRouter model identifier
         prompt_tokens: Number of input tokens
@@ -79,21 +113,73 @@ def calculate_cost(
     Returns:
         Cost in USD (rounded to 6 decimal places)
     """
-    pricing = get_model_pricing(model_id)
+    prompt_price, completion_price = _PRICE_PAIRS.get(model_id, _DEFAULT_PRICE_PAIR)
+
+    # Pricing is per million tokens
+    return round(prompt_tokens / 1_000_000 * prompt_price + completion_tokens / 1_000_000 * completion_price, 6)
+
+
+reload_pricing()
 
-    # Calculate cost (pricing is per million tokens)
-    prompt_cost = (prompt_tokens / 1_000_000) * pricing["prompt"]
-    completion_cost = (completion_tokens / 1_000_000) * pricing["completion"]
 
-    total_cost = prompt_cost + completion_cost
+@dataclass(slots=True)
+class UsageView:
+    """Token usage of a single API call, read once from the response's usage dict."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+    @classmethod
+    def from_dict(cls, usage: Optional[Dict[str, int]]) -> "UsageView":
+        if not usage:
+            return cls()
+        return cls(
+            usage.get('prompt_tokens', 0),
+            usage.get('completion_tokens', 0),
+            usage.get('total_tokens', 0)
+        )
+
+    def __add__(self, other: "UsageView") -> "UsageView":
+        return UsageView(
+            self.prompt_tokens + other.prompt_tokens,
+            self.completion_tokens + other.completion_tokens,
+            self.total_tokens + other.total_tokens
+        )
+
+    def cost(self, model_id: str) -> float:
+        """Cost of this usage for the given model."""
+        return calculate_cost(model_id, self.prompt_tokens, self.completion_tokens)
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    """
+    Load the tiktoken encoding used for estimates, or None if unavailable.
+
+    tiktoken is optional; the encoding may also need a one-time download,
+    so any failure to load it falls back to the character heuristic.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
 
-    return round(total_cost, 6)
+def warm_encoder() -> None:
+    """Load the token encoder ahead of the first estimate (blocking)."""
+    _get_encoder()
 
 
 def estimate_tokens(text: str) -> int:
     """
     Estimate token count from text.
-    Rule of thumb: ~4 characters per token for English text.
+    Uses tiktoken's cl100k_base encoding when installed; otherwise the rule
+    of thumb of ~4 characters per token for English text.
 
     Args:
         text: Input text
@@ -101,8 +187,11 @@ def estimate_tokens(text: str) -> int:
     Returns:
         Estimated token count
     """
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode_ordinary(text))
+
     # Simple estimation: 1 token ≈ 4 characters
-    # More accurate would use tiktoken, but this is fast
     return len(text) // 4
 
 
@@ -122,15 +211,36 @@ def estimate_query_cost(
     Returns:
         Dict with 'total', 'per_model', and 'models' breakdown
     """
-    prompt_tokens = estimate_tokens(prompt_text)
+    return estimate_cost_for_tokens(model_ids, estimate_tokens(prompt_text), estimated_response_tokens)
 
-    total_cost = 0.0
+
+def estimate_cost_for_tokens(
+    model_ids: list,
+    prompt_tokens: int,
+    estimated_response_tokens: int = 500
+) -> Dict[str, float]:
+    """
+    Estimate the cost of a query from an already estimated prompt size.
+
+    The estimate only depends on the prompt's token count, so callers can
+    cache on that instead of the prompt text.
+
+    Args:
+        model_ids: List of model identifiers
+        prompt_tokens: Estimated prompt token count
+        estimated_response_tokens: Expected response length (default 500)
+
+    Returns:
+        Same breakdown as estimate_query_cost
+    """
+    # Price each distinct model once; councils list their members for several stages
     model_costs = {}
+    total_cost = 0.0
 
-    for model_id in model_ids:
+    for model_id, count in Counter(model_ids).items():
         cost = calculate_cost(model_id, prompt_tokens, estimated_response_tokens)
         model_costs[model_id] = cost
-        total_cost += cost
+        total_cost += count * cost
 
     return {
         "total": round(total_cost, 4),
@@ -180,6 +290,20 @@ def get_cost_category(cost: float) -> str:
         return "very-high"
 
 
+_EMPTY_USAGE = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+_get_usage_tokens = itemgetter("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def _usage_tokens(result: Dict[str, Any]) -> Tuple[int, int, int]:
+    """Return (prompt, completion, total) tokens from a stage result's usage."""
+    usage = result.get('usage') or _EMPTY_USAGE
+    try:
+        return _get_usage_tokens(usage)
+    except KeyError:
+        # Partial usage dicts (e.g. from error responses)
+        return _get_usage_tokens({**_EMPTY_USAGE, **usage})
+
+
 def calculate_total_stats(
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
@@ -188,33 +312,17 @@ def calculate_total_stats(
     """
     Calculate total cost and tokens across all stages.
     """
+    # Stage 1/2.5, Stage 2 and Stage 3 results, accumulated in one pass
     total_cost = 0.0
-    total_tokens = {"prompt": 0, "completion": 0, "total": 0}
-
-    # Sum from Stage 1/2.5
-    for r in stage1_results:
-        total_cost += r.get('cost', 0)
-        u = r.get('usage', {})
-        total_tokens["prompt"] += u.get('prompt_tokens', 0)
-        total_tokens["completion"] += u.get('completion_tokens', 0)
-        total_tokens["total"] += u.get('total_tokens', 0)
-
-    # Sum from Stage 2
-    for r in stage2_results:
-        total_cost += r.get('cost', 0)
-        u = r.get('usage', {})
-        total_tokens["prompt"] += u.get('prompt_tokens', 0)
-        total_tokens["completion"] += u.get('completion_tokens', 0)
-        total_tokens["total"] += u.get('total_tokens', 0)
-
-    # Sum from Stage 3
-    total_cost += stage3_result.get('cost', 0)
-    u = stage3_result.get('usage', {})
-    total_tokens["prompt"] += u.get('prompt_tokens', 0)
-    total_tokens["completion"] += u.get('completion_tokens', 0)
-    total_tokens["total"] += u.get('total_tokens', 0)
+    prompt_total = completion_total = tokens_total = 0
+    for result in chain(stage1_results, stage2_results, (stage3_result,)):
+        total_cost += result.get('cost', 0)
+        prompt, completion, total = _usage_tokens(result)
+        prompt_total += prompt
+        completion_total += completion
+        tokens_total += total
 
     return {
         "total_cost": round(total_cost, 4),
-        "total_tokens": total_tokens
+        "total_tokens": {"prompt": prompt_total, "completion": completion_total, "total": tokens_total}
     }
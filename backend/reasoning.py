@@ -1,10 +1,11 @@
 """Utilities for handling reasoning models (o1, o3, DeepSeek-R1, etc.)."""
 
 import re
+from functools import lru_cache
 from typing import Dict, Tuple, Optional
 
 # Models that use extended reasoning with <think> tags or similar
-REASONING_MODELS = {
+REASONING_MODELS = frozenset({
     "openai/o1",
     "openai/o1-preview",
     "openai/o1-mini",
@@ -13,13 +14,23 @@ REASONING_MODELS = {
     "deepseek/deepseek-r1",
     "deepseek/deepseek-reasoner",
     "nex-agi/deepseek-v3.1-nex-n1:free",
-}
+})
 
 # Extended timeout for reasoning models (in seconds)
 REASONING_TIMEOUT = 300.0  # 5 minutes
 STANDARD_TIMEOUT = 120.0   # 2 minutes
 
+# Substrings that mark versioned or unlisted reasoning models
+REASONING_KEYWORDS = ('o1', 'o3', 'deepseek-r', 'reasoner', 'reasoning')
+_REASONING_KEYWORD_RE = re.compile('|'.join(map(re.escape, REASONING_KEYWORDS)))
 
+# Response parsing patterns, compiled once at import
+_TAG_RE = re.compile(r'<(think|reasoning|thought)>(.*?)</\1>(.*)', re.DOTALL)
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n+')
+_STEP_MARKER_RE = re.compile(r'(Step \d+|First|Second|Third|Finally|Therefore|Thus|In conclusion)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
 def is_reasoning_model(model_id: str) -> bool:
     """
     Check if a model is a reasoning model.
@@ -35,12 +46,10 @@ def is_reasoning_model(model_id: str) -> bool:
         return True
 
     # Check partial matches (for versioned models)
-    model_lower = model_id.lower()
-    reasoning_keywords = ['o1', 'o3', 'deepseek-r', 'reasoner', 'reasoning']
-
-    return any(keyword in model_lower for keyword in reasoning_keywords)
+    return _REASONING_KEYWORD_RE.search(model_id.lower()) is not None
 
 
+@lru_cache(maxsize=256)
 def get_model_timeout(model_id: str) -> float:
     """
     Get appropriate timeout for a model.
@@ -72,28 +81,16 @@ def parse_reasoning_response(content: str) -> Dict[str, str]:
     if not content:
         return {"thinking": "", "answer": ""}
 
-    # Try to extract <think> tags (DeepSeek-R1 style)
-    think_match = re.search(r'<think>(.*?)</think>(.*)', content, re.DOTALL)
-    if think_match:
-        return {
-            "thinking": think_match.group(1).strip(),
-            "answer": think_match.group(2).strip()
-        }
+    # Plain answers never contain tags, so skip the regex scan entirely
+    if '<' not in content:
+        return {"thinking": "", "answer": content}
 
-    # Try to extract <reasoning> tags
-    reasoning_match = re.search(r'<reasoning>(.*?)</reasoning>(.*)', content, re.DOTALL)
-    if reasoning_match:
+    # Extract the first <think> (DeepSeek-R1 style), <reasoning> or <thought> block
+    tag_match = _TAG_RE.search(content)
+    if tag_match:
         return {
-            "thinking": reasoning_match.group(1).strip(),
-            "answer": reasoning_match.group(2).strip()
-        }
-
-    # Try to extract <thought> tags
-    thought_match = re.search(r'<thought>(.*?)</thought>(.*)', content, re.DOTALL)
-    if thought_match:
-        return {
-            "thinking": thought_match.group(1).strip(),
-            "answer": thought_match.group(2).strip()
+            "thinking": tag_match.group(2).strip(),
+            "answer": tag_match.group(3).strip()
         }
 
     # If no tags found, return full content as answer
@@ -152,20 +149,12 @@ def format_thinking_for_display(thinking: str) -> str:
         return ""
 
     # Clean up extra whitespace
-    thinking = re.sub(r'\n\s*\n\s*\n+', '\n\n', thinking)
-
-    # Add structure if it's a long block of text
-    lines = thinking.split('\n')
+    thinking = _BLANK_LINES_RE.sub('\n\n', thinking)
 
-    # If it's very long, add some structure
-    if len(lines) > 10:
+    # If it's very long (more than 10 lines), add some structure
+    if thinking.count('\n') >= 10:
         # Try to identify step markers
-        thinking = re.sub(
-            r'(Step \d+|First|Second|Third|Finally|Therefore|Thus|In conclusion)',
-            r'\n\n**\1**',
-            thinking,
-            flags=re.IGNORECASE
-        )
+        thinking = _STEP_MARKER_RE.sub(r'\n\n**\1**', thinking)
 
     return thinking.strip()
 
@@ -1,12 +1,41 @@
 """JSON-based storage for conversations."""
 
-import json
 import os
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+
+import orjson
+
 from .config import DATA_DIR
 
+# Handlers run storage calls in worker threads, so read-modify-write updates
+# to the same conversation must not interleave.
+_update_lock = threading.RLock()
+
+# Parsed conversations keyed by file path, validated against the file's
+# (mtime_ns, size) so writes from other processes are still picked up.
+# Cached dicts are never mutated: updates write a new snapshot, and callers
+# get their own copy of the top-level dict and message list (see _snapshot).
+_conversation_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+# Bumped on every write so cached conversation lists can be revalidated
+_list_version = 0
+
+
+def list_version() -> int:
+    """Return a counter that changes whenever any conversation is written or deleted."""
+    return _list_version
+
+
+def bump_list_version():
+    """Invalidate cached conversation lists (e.g. after DATA_DIR changes)."""
+    global _list_version
+    # += is a read-modify-write; writes from worker threads must not lose bumps
+    with _update_lock:
+        _list_version += 1
+
 
 def ensure_data_dir():
     """Ensure the data directory exists."""
@@ -18,6 +47,52 @@ def get_conversation_path(conversation_id: str) -> str:
     return os.path.join(DATA_DIR, f"{conversation_id}.json")
 
 
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _load_json(path: str) -> Optional[Dict[str, Any]]:
+    """Load a conversation file, reusing the parsed copy if the file is unchanged."""
+    signature = _file_signature(path)
+    if signature is None:
+        _conversation_cache.pop(path, None)
+        return None
+
+    cached = _conversation_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+    _conversation_cache[path] = (signature, data)
+    return data
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """Write JSON atomically so concurrent readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, path)
+    _conversation_cache[path] = (_file_signature(path), data)
+    bump_list_version()
+
+
+def _snapshot(conversation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a conversation's top-level dict and message list.
+
+    Enough to keep cached conversations immutable: storage only ever appends
+    messages or replaces top-level fields, and message dicts are not edited
+    in place.
+    """
+    return {**conversation, "messages": list(conversation["messages"])}
+
+
 def create_conversation(
     conversation_id: str,
     council_models: Optional[List[str]] = None,
@@ -58,11 +133,9 @@ def create_conversation(
     }
 
     # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    _write_json(get_conversation_path(conversation_id), conversation)
 
-    return conversation
+    return _snapshot(conversation)
 
 
 def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
@@ -75,13 +148,8 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Conversation dict or None if not found
     """
-    path = get_conversation_path(conversation_id)
-
-    if not os.path.exists(path):
-        return None
-
-    with open(path, 'r') as f:
-        return json.load(f)
+    conversation = _load_json(get_conversation_path(conversation_id))
+    return _snapshot(conversation) if conversation is not None else None
 
 
 def save_conversation(conversation: Dict[str, Any]):
@@ -93,9 +161,8 @@ def save_conversation(conversation: Dict[str, Any]):
     """
     ensure_data_dir()
 
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    with _update_lock:
+        _write_json(get_conversation_path(conversation['id']), _snapshot(conversation))
 
 
 def list_conversations() -> List[Dict[str, Any]]:
@@ -110,16 +177,16 @@ def list_conversations() -> List[Dict[str, Any]]:
     conversations = []
     for filename in os.listdir(DATA_DIR):
         if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
+            data = _load_json(os.path.join(DATA_DIR, filename))
+            if data is None:
+                continue  # Deleted while listing
+            # Return metadata only
+            conversations.append({
+                "id": data["id"],
+                "created_at": data["created_at"],
+                "title": data.get("title", "New Conversation"),
+                "message_count": len(data["messages"])
+            })
 
     # Sort by creation time, newest first
     conversations.sort(key=lambda x: x["created_at"], reverse=True)
@@ -127,24 +194,51 @@ def list_conversations() -> List[Dict[str, Any]]:
     return conversations
 
 
-def add_user_message(conversation_id: str, content: str):
+def add_user_message(conversation_id: str, content: str) -> Dict[str, Any]:
     """
     Add a user message to a conversation.
 
     Args:
         conversation_id: Conversation identifier
         content: User message content
+
+    Returns:
+        The updated conversation
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    with _update_lock:
+        conversation = get_conversation(conversation_id)
+        if conversation is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["messages"].append({
-        "role": "user",
-        "content": content
-    })
+        conversation["messages"].append({
+            "role": "user",
+            "content": content
+        })
 
-    save_conversation(conversation)
+        save_conversation(conversation)
+        return conversation
+
+
+def discard_unanswered_message(conversation_id: str) -> bool:
+    """
+    Remove a trailing user message that never got a council answer.
+
+    Args:
+        conversation_id: Conversation identifier
+
+    Returns:
+        True if a message was removed
+    """
+    with _update_lock:
+        conversation = get_conversation(conversation_id)
+        if conversation is None or not conversation["messages"]:
+            return False
+        if conversation["messages"][-1].get("role") != "user":
+            return False
+
+        conversation["messages"].pop()
+        save_conversation(conversation)
+        return True
 
 
 def add_assistant_message(
@@ -164,23 +258,24 @@ def add_assistant_message(
         stage3: Final synthesized response
         metadata: Optional metadata (rankings, mappings, etc.)
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    with _update_lock:
+        conversation = get_conversation(conversation_id)
+        if conversation is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
 
-    message = {
-        "role": "assistant",
-        "stage1": stage1,
-        "stage2": stage2,
-        "stage3": stage3
-    }
-    
-    if metadata:
-        message["metadata"] = metadata
+        message = {
+            "role": "assistant",
+            "stage1": stage1,
+            "stage2": stage2,
+            "stage3": stage3
+        }
+
+        if metadata:
+            message["metadata"] = metadata
 
-    conversation["messages"].append(message)
+        conversation["messages"].append(message)
 
-    save_conversation(conversation)
+        save_conversation(conversation)
 
 
 def update_conversation_title(conversation_id: str, title: str):
@@ -191,12 +286,13 @@ def update_conversation_title(conversation_id: str, title: str):
         conversation_id: Conversation identifier
         title: New title for the conversation
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    with _update_lock:
+        conversation = get_conversation(conversation_id)
+        if conversation is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["title"] = title
-    save_conversation(conversation)
+        conversation["title"] = title
+        save_conversation(conversation)
 
 
 def delete_conversation(conversation_id: str) -> bool:
@@ -212,5 +308,7 @@ def delete_conversation(conversation_id: str) -> bool:
     path = get_conversation_path(conversation_id)
     if os.path.exists(path):
         os.remove(path)
+        _conversation_cache.pop(path, None)
+        bump_list_version()
         return True
     return False
@@ -9,7 +9,9 @@ def test_data_dir(tmp_path):
     data_dir = tmp_path / "data"
     data_dir.mkdir()
     
+    import backend.cache
     import backend.config
+    import backend.main
     import backend.storage
     
     original_config_dir = backend.config.DATA_DIR
@@ -17,6 +19,10 @@ def test_data_dir(tmp_path):
     
     backend.config.DATA_DIR = str(data_dir)
     backend.storage.DATA_DIR = str(data_dir)
+    backend.storage.bump_list_version()
+    backend.cache.clear_cache()
+    backend.main._models_cache = None
+    backend.main._models_fetch = None
     
     yield str(data_dir)
     
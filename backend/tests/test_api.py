@@ -1,7 +1,62 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
-from backend.main import app
+from backend.main import app, safe_filename, _FALLBACK_MODELS
 import json
+import asyncio
+from contextlib import ExitStack
+from unittest.mock import patch, AsyncMock
+
+# Names accepted by the fake_council fixture, mapped to what they patch in backend.main
+_COUNCIL_TARGETS = {
+    "config": "get_council_config",
+    "full_council": "run_full_council",
+    "stage1": "stage1_collect_responses",
+    "stage2": "stage2_collect_rankings",
+    "stage2_5": "stage2_5_rebuttal",
+    "stage3": "stage3_synthesize_stream",
+    "title": "generate_conversation_title",
+}
+
+async def _fake_config(conversation, user_query):
+    return ["m1"], "m3", None
+
+async def _fake_stage1(messages, council_models, model_personas):
+    return [{"model": "m1", "response": "r1"}]
+
+async def _fake_stage2(user_query, stage1_results, council_models, model_personas):
+    return [{"model": "m1", "ranking": "Response A", "parsed_ranking": ["Response A"]}], {"Response A": "m1"}
+
+async def _fake_stage2_5(user_query, stage1_results, stage2_results, label_to_model, model_personas):
+    return stage1_results
+
+async def _fake_stage3(user_query, stage1_results, stage2_results, chairman_model, model_personas):
+    yield {"result": {"model": "m3", "response": "final"}}
+
+async def _fake_title(content):
+    return "Title"
+
+@pytest.fixture
+def fake_council():
+    """Patch the council pipeline in backend.main with canned stages.
+
+    Call the returned function to install the patches for the rest of the
+    test. Keyword arguments (see _COUNCIL_TARGETS) replace a default fake;
+    passing None leaves that stage unpatched.
+    """
+    defaults = {
+        "config": _fake_config,
+        "stage1": _fake_stage1,
+        "stage2": _fake_stage2,
+        "stage2_5": _fake_stage2_5,
+        "stage3": _fake_stage3,
+        "title": _fake_title,
+    }
+    with ExitStack() as stack:
+        def install(**overrides):
+            for name, fake in {**defaults, **overrides}.items():
+                if fake is not None:
+                    stack.enter_context(patch(f"backend.main.{_COUNCIL_TARGETS[name]}", fake))
+        yield install
 
 @pytest.mark.asyncio
 async def test_root_endpoint():
@@ -29,6 +84,46 @@ async def test_config_endpoints():
         assert response.status_code == 200
         assert response.json()["council_models"] == ["m1", "m2"]
 
+        # Cached config reflects the update
+        response = await ac.get("/api/config")
+        assert response.json()["council_models"] == ["m1", "m2"]
+        assert response.json()["chairman_model"] == "m3"
+
+@pytest.mark.asyncio
+async def test_models_fallback():
+    with patch("backend.main.fetch_available_models", return_value=[]):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/api/models")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["models"] == list(_FALLBACK_MODELS)
+
+@pytest.mark.asyncio
+async def test_models_catalog_is_reused():
+    catalog = [{"id": "openai/gpt-4o", "name": "GPT-4o", "provider": "Openai", "description": ""}]
+    with patch("backend.main.fetch_available_models", new_callable=AsyncMock, return_value=catalog) as mock_fetch:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            first = await ac.get("/api/models")
+            second = await ac.get("/api/models")
+    assert first.json() == second.json() == {"models": catalog}
+    assert mock_fetch.await_count == 1
+
+@pytest.mark.asyncio
+async def test_models_concurrent_misses_share_one_fetch():
+    catalog = [{"id": "openai/gpt-4o", "name": "GPT-4o", "provider": "Openai", "description": ""}]
+    calls = []
+
+    async def slow_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return catalog
+
+    with patch("backend.main.fetch_available_models", slow_fetch):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            responses = await asyncio.gather(*(ac.get("/api/models") for _ in range(5)))
+    assert all(r.json() == {"models": catalog} for r in responses)
+    assert len(calls) == 1
+
 @pytest.mark.asyncio
 async def test_conversation_lifecycle(test_data_dir):
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
@@ -53,3 +148,361 @@ async def test_conversation_lifecycle(test_data_dir):
         # Get again (should be 404)
         response = await ac.get(f"/api/conversations/{conv_id}")
         assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_export_streams_markdown(test_data_dir):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+        response = await ac.get(f"/api/conversations/{conv_id}/export", params={"format": "markdown"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/markdown")
+    assert response.text.startswith("# ")
+
+@pytest.mark.asyncio
+async def test_send_message_generates_title_alongside_council(test_data_dir, fake_council):
+    council_started = asyncio.Event()
+
+    async def fake_title(content):
+        # Only completes if the council is already running
+        await asyncio.wait_for(council_started.wait(), timeout=1)
+        return "Parallel Title"
+
+    async def fake_run(messages, council_models, chairman_model, model_personas):
+        council_started.set()
+        await asyncio.sleep(0)
+        return [], [], {"model": "m3", "response": "done"}, {}
+
+    fake_council(full_council=fake_run, title=fake_title)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+        response = await ac.post(f"/api/conversations/{conv_id}/message", json={"content": "Hi"})
+        assert response.status_code == 200
+        conversation = (await ac.get(f"/api/conversations/{conv_id}")).json()
+
+    assert conversation["title"] == "Parallel Title"
+
+@pytest.mark.asyncio
+async def test_send_message_cancels_title_when_council_fails(test_data_dir, fake_council):
+    from backend import main, storage
+    from backend.schemas import SendMessageRequest
+
+    title_requested = asyncio.Event()
+    title_cancelled = asyncio.Event()
+
+    # The title request itself must be cancelled, not just the task awaiting it
+    async def slow_title_query(model, messages, timeout=None):
+        title_requested.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            title_cancelled.set()
+            raise
+
+    async def fake_run(messages, council_models, chairman_model, model_personas):
+        await title_requested.wait()
+        raise RuntimeError("council down")
+
+    storage.create_conversation("c1")
+    fake_council(full_council=fake_run, title=None)
+    with patch("backend.batching.query_model", slow_title_query):
+        with pytest.raises(RuntimeError):
+            await main.send_message("c1", SendMessageRequest(content="Hi"))
+        await asyncio.wait_for(title_cancelled.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_stream_emits_events_in_order(test_data_dir, fake_council):
+    async def fake_stage3(user_query, stage1_results, stage2_results, chairman_model, model_personas):
+        yield {"delta": "fin"}
+        yield {"delta": "al"}
+        yield {"result": {"model": "m3", "response": "final"}}
+
+    fake_council(stage3=fake_stage3)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+        response = await ac.post(f"/api/conversations/{conv_id}/message/stream", json={"content": "Hi"})
+
+    events = [json.loads(line[len("data: "):])["type"] for line in response.text.split("\n") if line.startswith("data: ")]
+    assert events == [
+        "stage1_start", "stage1_complete", "stage2_start", "stage2_complete",
+        "stage2_5_start", "stage1_complete", "stage3_start", "stage3_delta", "stage3_delta", "stage3_complete",
+        "title_complete", "complete",
+    ]
+
+@pytest.mark.asyncio
+async def test_cached_stream_replays_the_saved_message(test_data_dir, fake_council):
+    async def fake_stage2_5(user_query, stage1_results, stage2_results, label_to_model, model_personas):
+        return [{"model": "m1", "response": "revised"}]
+
+    fake_council(stage2_5=fake_stage2_5)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        saved = []
+        for _ in range(2):
+            conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+            await ac.post(f"/api/conversations/{conv_id}/message/stream", json={"content": "Hi"})
+            saved.append((await ac.get(f"/api/conversations/{conv_id}")).json()["messages"][-1])
+
+    assert saved[0]["stage1"] == [{"model": "m1", "response": "revised"}]
+    for stage in ("stage1", "stage2", "stage3"):
+        assert saved[1][stage] == saved[0][stage]
+    # Only the spend differs: the replay cost nothing
+    assert saved[1]["metadata"]["cached"] is True
+    assert saved[1]["metadata"]["label_to_model"] == saved[0]["metadata"]["label_to_model"]
+
+@pytest.mark.asyncio
+async def test_stream_omits_stage2_and_stage3_thinking(test_data_dir, fake_council):
+    async def fake_stage1(messages, council_models, model_personas):
+        return [{"model": "m1", "response": "r1", "thinking": "stage1 trace"}]
+
+    async def fake_stage2(user_query, stage1_results, council_models, model_personas):
+        return [{"model": "m1", "ranking": "Response A", "parsed_ranking": ["Response A"], "thinking": "stage2 trace"}], {"Response A": "m1"}
+
+    async def fake_stage3(user_query, stage1_results, stage2_results, chairman_model, model_personas):
+        yield {"result": {"model": "m3", "response": "final", "thinking": "stage3 trace"}}
+
+    fake_council(stage1=fake_stage1, stage2=fake_stage2, stage3=fake_stage3)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+        response = await ac.post(f"/api/conversations/{conv_id}/message/stream", json={"content": "Hi"})
+        saved = (await ac.get(f"/api/conversations/{conv_id}")).json()
+
+    assert "stage1 trace" in response.text
+    assert "stage2 trace" not in response.text
+    assert "stage3 trace" not in response.text
+    assert saved["messages"][-1]["stage2"][0]["thinking"] == "stage2 trace"
+
+@pytest.mark.asyncio
+async def test_large_html_export_uses_worker_pool(test_data_dir):
+    from concurrent.futures import ThreadPoolExecutor
+    from backend import main, storage
+
+    storage.create_conversation("big")
+    conversation = storage.get_conversation("big")
+    conversation["messages"] = [{"role": "user", "content": "<hi>"}] * main.HTML_EXPORT_OFFLOAD_MESSAGES
+    storage.save_conversation(conversation)
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    with patch("backend.main._get_export_pool", return_value=pool):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/api/conversations/big/export", params={"format": "html"})
+    pool.shutdown()
+
+    assert response.status_code == 200
+    assert response.text.count("&lt;hi&gt;") == main.HTML_EXPORT_OFFLOAD_MESSAGES
+
+@pytest.mark.asyncio
+async def test_lifespan_shuts_down_export_pool():
+    from concurrent.futures import ThreadPoolExecutor
+    from backend import main
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    async with main.lifespan(app):
+        main._export_pool = pool
+    assert main._export_pool is None
+    assert pool._shutdown
+
+@pytest.mark.asyncio
+async def test_lifespan_loads_token_encoder():
+    from backend import main
+
+    with patch("backend.main.warm_encoder") as warm:
+        async with main.lifespan(app):
+            assert warm.call_count == 1
+
+@pytest.mark.asyncio
+async def test_stream_stops_and_cancels_title_on_disconnect(test_data_dir, fake_council):
+    from backend import main, storage
+    from backend.schemas import SendMessageRequest
+
+    title_requested = asyncio.Event()
+    title_cancelled = asyncio.Event()
+    stage2_calls = []
+
+    async def slow_title_query(model, messages, timeout=None):
+        title_requested.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            title_cancelled.set()
+            raise
+
+    async def fake_stage1(messages, council_models, model_personas):
+        await title_requested.wait()
+        return [{"model": "m1", "response": "r1"}]
+
+    async def fake_stage2(*args):
+        stage2_calls.append(args)
+        return [], {}
+
+    class DisconnectedRequest:
+        headers = {}
+
+        async def is_disconnected(self):
+            return True
+
+    storage.create_conversation("c1")
+    fake_council(stage1=fake_stage1, stage2=fake_stage2, title=None)
+    with patch("backend.batching.query_model", slow_title_query):
+        response = await main.send_message_stream("c1", SendMessageRequest(content="Hi"), DisconnectedRequest())
+        chunks = [chunk async for chunk in response.body_iterator]
+        await asyncio.wait_for(title_cancelled.wait(), timeout=1)
+
+    assert b"stage1_start" in chunks[0]
+    assert len(chunks) == 1
+    assert stage2_calls == []
+
+async def _collect(response):
+    return [chunk async for chunk in response.body_iterator]
+
+@pytest.mark.asyncio
+async def test_disconnect_during_a_stage_cancels_its_model_calls(test_data_dir, fake_council):
+    from backend import main, storage
+    from backend.schemas import SendMessageRequest
+
+    started, cancelled = [], []
+
+    async def slow_query(model, messages, timeout=None):
+        started.append(model)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+
+    async def fake_config(conversation, user_query):
+        return ["m1", "m2"], "m3", None
+
+    class LeavesMidStage:
+        headers = {}
+
+        async def is_disconnected(self):
+            return len(started) == 2
+
+    storage.create_conversation("c1")
+    # Stage 1 runs for real so its model calls can be watched
+    fake_council(config=fake_config, stage1=None)
+    with patch("backend.main.DISCONNECT_POLL_INTERVAL", 0.01), \
+         patch("backend.council.query_model", slow_query):
+        response = await main.send_message_stream("c1", SendMessageRequest(content="Hi"), LeavesMidStage())
+        chunks = await asyncio.wait_for(_collect(response), timeout=1)
+        await asyncio.sleep(0)
+
+    assert sorted(cancelled) == ["m1", "m2"]
+    assert chunks == [main.beacon(main.sse_event, "stage1_start")]
+    assert storage.get_conversation("c1")["messages"] == []
+
+@pytest.mark.asyncio
+async def test_large_responses_are_gzipped(test_data_dir):
+    from backend import storage
+
+    storage.create_conversation("c1")
+    storage.add_user_message("c1", "lorem ipsum " * 500)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/conversations/c1", headers={"Accept-Encoding": "gzip"})
+        small = await ac.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["messages"][0]["content"].startswith("lorem ipsum")
+    assert "content-encoding" not in small.headers
+
+@pytest.mark.asyncio
+async def test_stream_supports_ndjson(test_data_dir, fake_council):
+    # Large enough that GZipMiddleware would otherwise buffer and compress it
+    message = "boom " * 500
+
+    async def fake_config(conversation, user_query):
+        raise RuntimeError(message)
+
+    fake_council(config=fake_config)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+        response = await ac.post(
+            f"/api/conversations/{conv_id}/message/stream",
+            json={"content": "Hi"},
+            headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"}
+        )
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "content-encoding" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"type": "error", "message": message}]
+
+@pytest.mark.asyncio
+async def test_list_conversations_etag(test_data_dir):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.post("/api/conversations", json={"mode": "standard"})
+        first = await ac.get("/api/conversations")
+        etag = first.headers["etag"]
+
+        unchanged = await ac.get("/api/conversations", headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.content == b""
+
+        await ac.post("/api/conversations", json={"mode": "standard"})
+        changed = await ac.get("/api/conversations", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert len(changed.json()) == 2
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_served_from_council_cache(test_data_dir, fake_council):
+    calls = []
+
+    async def fake_run(messages, council_models, chairman_model, model_personas):
+        calls.append(messages)
+        metadata = {"label_to_model": {}, "aggregate_rankings": [], "total_cost": 0.5, "total_tokens": {"prompt": 1, "completion": 1, "total": 2}}
+        return [{"model": "m1", "response": "4"}], [], {"model": "m3", "response": "4"}, metadata
+
+    fake_council(full_council=fake_run)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for content in ("What is 2+2?", "what is  2+2?"):
+            conv_id = (await ac.post("/api/conversations", json={"mode": "standard"})).json()["id"]
+            response = await ac.post(f"/api/conversations/{conv_id}/message", json={"content": content})
+
+    assert len(calls) == 1
+    assert response.json()["stage3"]["response"] == "4"
+    assert response.json()["metadata"]["cached"] is True
+    assert response.json()["metadata"]["total_cost"] == 0.0
+
+@pytest.mark.asyncio
+async def test_estimate_cost(test_data_dir):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/estimate-cost", json={"content": "x" * 400})
+    data = response.json()
+    assert response.status_code == 200
+    assert data["prompt_tokens"] == 100
+    assert data["estimated_response_tokens"] == 500
+    assert set(data["breakdown"]) == {"stage1_cost", "stage2_cost", "stage3_cost"}
+
+@pytest.mark.asyncio
+async def test_estimate_cost_follows_price_reload(test_data_dir):
+    from backend import config, pricing
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        before = (await ac.post("/api/estimate-cost", json={"content": "x" * 400})).json()
+        free = {model: {"prompt": 0.0, "completion": 0.0} for model in [*config.COUNCIL_MODELS, config.CHAIRMAN_MODEL]}
+        with patch.dict(pricing.MODEL_PRICING, free):
+            pricing.reload_pricing()
+            after = (await ac.post("/api/estimate-cost", json={"content": "x" * 400})).json()
+        pricing.reload_pricing()
+
+    assert before["estimated_cost"] > 0
+    assert after["estimated_cost"] == 0
+
+def test_safe_filename():
+    assert safe_filename("Résumé tips: 2024/25?") == "Résumé_tips__2024_25_"
+    assert len(safe_filename("x" * 80)) == 50
+
+def test_safe_filename_table_does_not_grow():
+    from backend.main import _FILENAME_TABLE
+
+    size = len(_FILENAME_TABLE)
+    assert safe_filename("日本語 テスト") == "日本語_テスト"
+    assert len(_FILENAME_TABLE) == size
+
+@pytest.mark.asyncio
+async def test_send_message_to_missing_conversation_is_404(test_data_dir):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        plain = await ac.post("/api/conversations/missing/message", json={"content": "Hi"})
+        stream = await ac.post("/api/conversations/missing/message/stream", json={"content": "Hi"})
+    assert plain.status_code == 404
+    assert stream.status_code == 404
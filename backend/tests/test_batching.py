@@ -0,0 +1,72 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from backend.batching import FlashBatcher, CircuitBreaker
+
+
+@pytest.mark.asyncio
+async def test_concurrent_prompts_share_one_request():
+    calls = []
+
+    async def fake_query(model, messages, timeout=None):
+        calls.append(messages[0]["content"])
+        return {"content": json.dumps({"t0": "first", "t1": "second"})}
+
+    batcher = FlashBatcher(window=0.01)
+    with patch("backend.batching.query_model", side_effect=fake_query):
+        answers = await asyncio.gather(batcher.ask("prompt one"), batcher.ask("prompt two"))
+
+    assert answers == ["first", "second"]
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_unparseable_batch_falls_back_to_single_requests():
+    calls = []
+
+    async def fake_query(model, messages, timeout=None):
+        calls.append(messages[0]["content"])
+        if len(calls) == 1:
+            return {"content": "not json"}
+        return {"content": f"answer {len(calls)}"}
+
+    batcher = FlashBatcher(window=0.01)
+    with patch("backend.batching.query_model", side_effect=fake_query):
+        answers = await asyncio.gather(batcher.ask("prompt one"), batcher.ask("prompt two"))
+
+    assert len(calls) == 3
+    assert all(answer.startswith("answer") for answer in answers)
+
+@pytest.mark.asyncio
+async def test_failed_request_returns_none():
+    async def fake_query(model, messages, timeout=None):
+        return {"error": "boom", "content": "Error: boom"}
+
+    batcher = FlashBatcher(window=0.01)
+    with patch("backend.batching.query_model", side_effect=fake_query):
+        assert await batcher.ask("prompt") is None
+
+def test_circuit_breaker_opens_on_failures():
+    breaker = CircuitBreaker(window=60.0, min_failures=3, failure_ratio=0.5)
+    breaker.record(True)
+    breaker.record(False)
+    breaker.record(False)
+    assert not breaker.is_open()
+    breaker.record(False)
+    assert breaker.is_open()
+
+def test_circuit_breaker_resets_after_window():
+    breaker = CircuitBreaker(window=0.0, min_failures=1, failure_ratio=0.5)
+    breaker.record(False)
+    breaker.window_start -= 1
+    assert not breaker.is_open()
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_requests():
+    batcher = FlashBatcher(window=0.01)
+    for _ in range(3):
+        batcher.breaker.record(False)
+
+    with patch("backend.batching.query_model") as mock_query:
+        assert await batcher.ask("prompt") is None
+        assert not mock_query.called
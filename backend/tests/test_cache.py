@@ -0,0 +1,105 @@
+import pytest
+from backend import cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cache.clear_cache()
+    yield
+    cache.clear_cache()
+
+
+def test_cache_key_is_stable():
+    messages = [{"role": "user", "content": "Hello"}]
+    assert cache.make_cache_key("m1", messages) == cache.make_cache_key("m1", list(messages))
+    assert cache.make_cache_key("m1", messages) != cache.make_cache_key("m2", messages)
+
+def test_lru_eviction():
+    lru = cache.LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert len(lru) == 2
+
+def test_volatile_messages_not_cacheable():
+    assert cache.is_cacheable([{"role": "user", "content": "What is 2+2?"}])
+    assert not cache.is_cacheable([{"role": "user", "content": "Now is 2025-01-01T10:00"}])
+    assert not cache.is_cacheable([])
+
+@pytest.mark.asyncio
+async def test_cached_llm_skips_repeat_calls():
+    calls = []
+
+    @cache.cached_llm
+    async def fake_query(model, messages, timeout=None):
+        calls.append(model)
+        return {"content": "answer", "usage": {}}
+
+    messages = [{"role": "user", "content": "Hello"}]
+    first = await fake_query("m1", messages)
+    second = await fake_query("m1", messages)
+
+    assert len(calls) == 1
+    assert first["content"] == second["content"]
+    assert second["cached"] is True
+
+@pytest.mark.asyncio
+async def test_cached_llm_does_not_cache_errors():
+    calls = []
+
+    @cache.cached_llm
+    async def fake_query(model, messages, timeout=None):
+        calls.append(model)
+        return {"error": "boom", "content": "Error: boom"}
+
+    messages = [{"role": "user", "content": "Hello"}]
+    await fake_query("m1", messages)
+    await fake_query("m1", messages)
+
+    assert len(calls) == 2
+
+def test_council_key_ignores_case_and_whitespace():
+    a = cache.make_council_key([{"role": "user", "content": "What is  2+2?"}], ["m1"], "m2")
+    b = cache.make_council_key([{"role": "user", "content": "what is 2+2?\n"}], ["m1"], "m2")
+    c = cache.make_council_key([{"role": "user", "content": "what is 2+2?"}], ["m1", "m3"], "m2")
+    assert a == b
+    assert a != c
+
+def test_council_results_skip_failed_runs():
+    messages = [{"role": "user", "content": "Hello"}]
+    key = cache.make_council_key(messages, ["m1"], "m2")
+    cache.store_council_result(key, messages, {"stage1": [], "stage2": [], "stage3": {"model": "error"}, "metadata": {}})
+    assert cache.get_council_result(key) is None
+
+    result = {"stage1": [{"model": "m1", "response": "hi"}], "stage2": [], "stage3": {"model": "m2", "response": "hi"}, "metadata": {}}
+    cache.store_council_result(key, messages, result)
+    assert cache.get_council_result(key) == result
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_call_when_last_caller_cancels():
+    import asyncio
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    @cache.single_flight_cache(maxsize=4)
+    async def slow(arg):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return arg
+
+    first = asyncio.create_task(slow("x"))
+    second = asyncio.create_task(slow("x"))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
@@ -35,3 +35,127 @@ async def test_get_council_config(test_data_dir):
     assert chairman == "c1"
     assert personas == {}
 
+def test_split_critique_by_label():
+    text = """**Response A:** Clear but shallow.
+
+**Response B:** Thorough and accurate.
+
+FINAL RANKING:
+1. Response B
+2. Response A"""
+    sections = council.split_critique_by_label(text, ["Response A", "Response B"])
+    assert "shallow" in sections["Response A"]
+    assert "Thorough" not in sections["Response A"]
+    assert "Thorough" in sections["Response B"]
+    assert "FINAL RANKING" not in sections["Response B"]
+
+def test_split_critique_by_label_stops_before_ranking_tail():
+    text = """**Response A:** Clear but shallow.
+
+**Response B:** Thorough and accurate.
+
+FINAL RANKING:
+Response B
+Response A
+
+```json
+{"ranking": ["Response B", "Response A"]}
+```"""
+    sections = council.split_critique_by_label(text, ["Response A", "Response B"])
+    assert sections == {
+        "Response A": "**Response A:** Clear but shallow.",
+        "Response B": "**Response B:** Thorough and accurate.",
+    }
+
+    json_only = text.replace("FINAL RANKING:\nResponse B\nResponse A\n\n", "")
+    sections = council.split_critique_by_label(json_only, ["Response A", "Response B"])
+    assert sections["Response B"] == "**Response B:** Thorough and accurate."
+
+def test_split_critique_by_label_unstructured_falls_back():
+    text = "Both responses are fine, Response A slightly better."
+    sections = council.split_critique_by_label(text, ["Response A", "Response B"])
+    assert sections == {"Response A": text, "Response B": text}
+
+@pytest.mark.asyncio
+async def test_gather_with_deadline_drops_slow_tasks():
+    import asyncio
+
+    async def fast():
+        return "fast"
+
+    async def slow():
+        await asyncio.sleep(5)
+        return "slow"
+
+    results = await council.gather_with_deadline({"m1": fast(), "m2": slow()}, deadline=0.05)
+    assert results == {"m1": "fast"}
+
+@pytest.mark.asyncio
+async def test_cancelling_a_stage_cancels_its_model_calls():
+    import asyncio
+    started, cancelled = [], []
+
+    async def slow_query(model, messages, timeout=None):
+        started.append(model)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+
+    with patch("backend.council.query_model", side_effect=slow_query):
+        stage = asyncio.create_task(council.stage1_collect_responses(
+            [{"role": "user", "content": "q"}], ["m1", "m2"]
+        ))
+        while len(started) < 2:
+            await asyncio.sleep(0)
+        stage.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await stage
+        await asyncio.sleep(0)
+
+    assert sorted(cancelled) == ["m1", "m2"]
+
+@pytest.mark.asyncio
+async def test_stage1_preserves_council_order():
+    async def fake_query(model, messages, timeout=None):
+        return {"content": f"answer from {model}", "usage": {}}
+
+    with patch("backend.council.query_model", side_effect=fake_query):
+        results = await council.stage1_collect_responses(
+            [{"role": "user", "content": "q"}], ["m2", "m1", "m3"]
+        )
+
+    assert [r["model"] for r in results] == ["m2", "m1", "m3"]
+
+def test_calculate_aggregate_rankings():
+    label_to_model = {"Response A": "m1", "Response B": "m2"}
+    stage2 = [
+        {"parsed_ranking": ["Response B", "Response A"], "ranking": ""},
+        {"parsed_ranking": ["Response B", "Response A"], "ranking": ""},
+        {"parsed_ranking": ["Response A", "Response B"], "ranking": ""},
+    ]
+    aggregate = council.calculate_aggregate_rankings(stage2, label_to_model)
+    assert aggregate == [
+        {"model": "m2", "average_rank": 1.33, "rankings_count": 3},
+        {"model": "m1", "average_rank": 1.67, "rankings_count": 3},
+    ]
+
+@pytest.mark.asyncio
+async def test_generate_title_shares_concurrent_calls():
+    import asyncio
+    mock_ask = AsyncMock(return_value='"Basic Arithmetic"')
+    with patch("backend.council.flash_batcher.ask", mock_ask):
+        titles = await asyncio.gather(*(council.generate_conversation_title("What is 2+2?") for _ in range(3)))
+        again = await council.generate_conversation_title("What is 2+2?")
+
+    assert titles == ["Basic Arithmetic"] * 3
+    assert again == "Basic Arithmetic"
+    assert mock_ask.await_count == 1
+
+@pytest.mark.asyncio
+async def test_generate_title_failure_is_not_cached():
+    with patch("backend.council.flash_batcher.ask", AsyncMock(return_value=None)):
+        assert await council.generate_conversation_title("Hello") == "New Conversation"
+    with patch("backend.council.flash_batcher.ask", AsyncMock(return_value="Greeting")):
+        assert await council.generate_conversation_title("Hello") == "Greeting"
@@ -0,0 +1,74 @@
+import json
+
+from backend import export
+
+
+def sample_conversation():
+    return {
+        "id": "conv-1",
+        "created_at": "2025-01-01T00:00:00",
+        "title": "Test Conversation",
+        "messages": [
+            {"role": "user", "content": "What is <b>2+2</b>?"},
+            {
+                "role": "assistant",
+                "stage1": [{"model": "openai/gpt-5.2", "response": "4"}],
+                "stage2": [{"model": "openai/gpt-5.2", "ranking": "Response A is correct"}],
+                "stage3": {"model": "google/gemini-3-pro-preview", "response": "The answer\nis 4"},
+                "metadata": {
+                    "aggregate_rankings": [
+                        {"model": "openai/gpt-5.2", "average_rank": 1.0, "rankings_count": 1}
+                    ]
+                }
+            }
+        ]
+    }
+
+def test_export_to_markdown():
+    md = export.export_to_markdown(sample_conversation())
+    assert md.startswith("# Test Conversation\n")
+    assert "## Message 1: User" in md
+    assert "#### gpt-5.2\n\n4\n" in md
+    assert "| 1 | gpt-5.2 | 1.00 | 1 |" in md
+    assert "**Chairman:** gemini-3-pro-preview" in md
+
+def test_export_to_html_escapes_content():
+    html = export.export_to_html(sample_conversation())
+    assert html.startswith("<!DOCTYPE html>")
+    assert "What is &lt;b&gt;2+2&lt;/b&gt;?" in html
+    assert "The answer<br>is 4" in html
+    assert "<td>gpt-5.2</td>" in html
+    assert html.rstrip().endswith("</html>")
+
+def test_export_to_json():
+    assert '"id": "conv-1"' in export.export_to_json(sample_conversation())
+
+def test_export_to_html_escapes_title():
+    conversation = sample_conversation()
+    conversation["title"] = "<script>alert(1)</script>"
+    html = export.export_to_html(conversation)
+    assert "<script>" not in html
+    assert "<title>&lt;script&gt;alert(1)&lt;/script&gt;</title>" in html
+
+def test_export_to_json_round_trips_unicode():
+    conversation = sample_conversation()
+    conversation["title"] = "Café ☕"
+    compact = export.export_to_json(conversation, pretty=False)
+    assert "Café ☕" in compact
+    assert "\n" not in compact
+    assert json.loads(compact) == conversation
+
+def test_iter_exports_yield_per_message():
+    conversation = sample_conversation()
+    md_chunks = list(export.iter_markdown(conversation))
+    html_chunks = list(export.iter_html(conversation))
+    # Header + one chunk per message (+ footer for HTML)
+    assert len(md_chunks) == 1 + len(conversation["messages"])
+    assert len(html_chunks) == 2 + len(conversation["messages"])
+    assert "".join(md_chunks) == export.export_to_markdown(conversation)
+
+def test_iter_json_matches_pretty_export():
+    conversation = sample_conversation()
+    chunks = list(export.iter_json(conversation))
+    assert b"".join(chunks).decode("utf-8") == export.export_to_json(conversation)
+    assert len(chunks) > len(conversation["messages"])
@@ -0,0 +1,136 @@
+import httpx
+import pytest
+from unittest.mock import patch, AsyncMock
+from backend import openrouter
+
+
+def make_status_error(status, headers=None):
+    request = httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions")
+    response = httpx.Response(status, request=request, headers=headers or {})
+    return httpx.HTTPStatusError(f"status {status}", request=request, response=response)
+
+def test_classify_error():
+    assert isinstance(openrouter.classify_error(make_status_error(503)), openrouter.RecoverableError)
+    assert isinstance(openrouter.classify_error(make_status_error(401)), openrouter.UnrecoverableError)
+    assert isinstance(openrouter.classify_error(KeyError("choices")), openrouter.RecoverableError)
+
+    rate_limited = openrouter.classify_error(make_status_error(429, {"Retry-After": "7"}))
+    assert rate_limited.retry_after == 7.0
+
+def test_retry_delay_respects_retry_after():
+    assert openrouter.retry_delay(0, retry_after=10.0) >= 10.0
+    assert openrouter.retry_delay(10) <= openrouter.RETRY_MAX_DELAY
+
+@pytest.mark.asyncio
+async def test_retry_transient_recovers():
+    calls = []
+
+    @openrouter.retry_transient
+    async def flaky(model):
+        calls.append(model)
+        if len(calls) < 3:
+            raise make_status_error(502)
+        return "ok"
+
+    with patch("backend.openrouter.asyncio.sleep", new_callable=AsyncMock):
+        assert await flaky("m1") == "ok"
+    assert len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_retry_transient_does_not_retry_terminal_errors():
+    calls = []
+
+    @openrouter.retry_transient
+    async def unauthorized(model):
+        calls.append(model)
+        raise make_status_error(401)
+
+    with patch("backend.openrouter.asyncio.sleep", new_callable=AsyncMock):
+        with pytest.raises(httpx.HTTPStatusError):
+            await unauthorized("m1")
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_get_client_is_shared():
+    client = openrouter.get_client()
+    assert openrouter.get_client() is client
+    await openrouter.close_client()
+    assert client.is_closed
+    assert openrouter.get_client() is not client
+    await openrouter.close_client()
+
+@pytest.mark.asyncio
+async def test_requests_use_shared_client():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "hi"}}]})
+
+    client = openrouter.get_client()
+    await client.aclose()
+    openrouter._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        first = await openrouter._post_chat_completion("m1", {}, {"model": "m1"}, 5.0)
+        second = await openrouter._post_chat_completion("m2", {}, {"model": "m2"}, 5.0)
+    finally:
+        await openrouter.close_client()
+
+    assert first["choices"][0]["message"]["content"] == "hi"
+    assert second["choices"][0]["message"]["content"] == "hi"
+    assert len(seen) == 2
+
+@pytest.mark.asyncio
+async def test_provider_semaphore_is_per_provider():
+    openai = openrouter.provider_semaphore("openai/gpt-4o")
+    assert openrouter.provider_semaphore("openai/o1") is openai
+    assert openrouter.provider_semaphore("anthropic/claude-3.5-sonnet") is not openai
+
+@pytest.mark.asyncio
+async def test_request_semaphore_caps_concurrency():
+    import asyncio
+    in_flight, peak = 0, 0
+
+    async def slow_post(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"choices": [{"message": {"content": "hi"}}]}, request=httpx.Request("POST", "http://test"))
+
+    with patch("backend.openrouter.MAX_CONCURRENT_REQUESTS", 2), \
+         patch("backend.openrouter._semaphores_loop", None):
+        client = openrouter.get_client()
+        with patch.object(client, "post", slow_post):
+            await asyncio.gather(*(
+                openrouter._post_chat_completion(f"p{i}/m", {}, {}, 5.0) for i in range(6)
+            ))
+        await openrouter.close_client()
+
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_stream_model_yields_deltas_then_response():
+    body = (
+        ": OPENROUTER PROCESSING\n\n"
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        'data: {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    def handler(request):
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    client = openrouter.get_client()
+    await client.aclose()
+    openrouter._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        events = [event async for event in openrouter.stream_model("openai/gpt-4o", [{"role": "user", "content": "Hi"}])]
+    finally:
+        await openrouter.close_client()
+
+    assert events[:2] == [{"delta": "Hel"}, {"delta": "lo"}]
+    assert events[2]["response"]["content"] == "Hello"
+    assert events[2]["response"]["usage"]["total_tokens"] == 5
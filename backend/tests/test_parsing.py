@@ -5,7 +5,7 @@ import os
 # Add parent directory to path so we can import backend
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from backend.council import parse_ranking_from_text
+from backend.council import parse_ranking_from_text, salvage_ranking_from_text
 
 class TestParsing(unittest.TestCase):
     def test_json_parsing_markdown(self):
@@ -50,5 +50,20 @@ class TestParsing(unittest.TestCase):
         result = parse_ranking_from_text(text)
         self.assertEqual(result, ["Response C", "Response A", "Response B"])
 
+    def test_salvage_uses_ranking_section(self):
+        text = """
+        Response A is solid. Response B is weak. Response C is best.
+
+        My overall ranking puts Response C first, then Response A, then Response B.
+        """
+        labels = ["Response A", "Response B", "Response C"]
+        result = salvage_ranking_from_text(text, labels)
+        self.assertEqual(result, ["Response C", "Response A", "Response B"])
+
+    def test_salvage_requires_all_labels(self):
+        text = "Ranking: Response B, then Response A"
+        labels = ["Response A", "Response B", "Response C"]
+        self.assertEqual(salvage_ranking_from_text(text, labels), [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,4 @@
+from unittest.mock import patch
 from backend import pricing
 
 def test_calculate_cost():
@@ -10,8 +11,17 @@ def test_calculate_cost():
     assert cost == 4.0
 
 def test_estimate_tokens():
-    assert pricing.estimate_tokens("Hello world") == 2 # 11 // 4
-    assert pricing.estimate_tokens("a" * 100) == 25
+    with patch("backend.pricing._get_encoder", return_value=None):
+        assert pricing.estimate_tokens("Hello world") == 2 # 11 // 4
+        assert pricing.estimate_tokens("a" * 100) == 25
+
+def test_estimate_tokens_uses_encoder_when_available():
+    class FakeEncoder:
+        def encode_ordinary(self, text):
+            return text.split()
+
+    with patch("backend.pricing._get_encoder", return_value=FakeEncoder()):
+        assert pricing.estimate_tokens("one two three") == 3
 
 def test_format_cost():
     assert pricing.format_cost(0.001234) == "$0.0012"
@@ -29,3 +39,32 @@ def test_calculate_total_stats():
     assert stats["total_tokens"]["total"] == 1200
     assert stats["total_tokens"]["prompt"] == 600
     assert stats["total_tokens"]["completion"] == 600
+
+def test_calculate_total_stats_missing_usage():
+    stage1 = [{"cost": 0.1, "usage": {}}, {"cost": 0.1}]
+    stage2 = [{"cost": 0.2, "usage": {"prompt_tokens": 5}}]
+    stage3 = {"cost": 0.0, "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}}
+
+    stats = pricing.calculate_total_stats(stage1, stage2, stage3)
+    assert stats["total_cost"] == 0.4
+    assert stats["total_tokens"] == {"prompt": 6, "completion": 2, "total": 3}
+
+def test_usage_view():
+    a = pricing.UsageView.from_dict({"prompt_tokens": 100000, "completion_tokens": 100000, "total_tokens": 200000})
+    b = pricing.UsageView.from_dict(None)
+    assert (a + b).to_dict() == {"prompt_tokens": 100000, "completion_tokens": 100000, "total_tokens": 200000}
+    assert a.cost("openai/gpt-5.2") == 4.0
+
+def test_reload_pricing_picks_up_changes():
+    pricing.calculate_cost("test/model", 1_000_000, 0)
+    with patch.dict(pricing.MODEL_PRICING, {"test/model": {"prompt": 2.0, "completion": 4.0}}):
+        pricing.reload_pricing()
+        assert pricing.calculate_cost("test/model", 1_000_000, 1_000_000) == 6.0
+    pricing.reload_pricing()
+    assert pricing.calculate_cost("test/model", 1_000_000, 1_000_000) == 4.0
+
+def test_estimate_cost_counts_repeated_models():
+    single = pricing.estimate_cost_for_tokens(["openai/gpt-5.2"], 1000, 500)
+    council = pricing.estimate_cost_for_tokens(["openai/gpt-5.2", "openai/gpt-5.2", "deepseek/deepseek-r1"], 1000, 500)
+    assert council["models"]["openai/gpt-5.2"] == single["total"]
+    assert council["total"] == round(2 * single["total"] + council["models"]["deepseek/deepseek-r1"], 4)
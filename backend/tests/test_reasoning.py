@@ -0,0 +1,29 @@
+from backend.reasoning import parse_reasoning_response, format_thinking_for_display, is_reasoning_model
+
+
+def test_parse_reasoning_extracts_each_tag_style():
+    for tag in ("think", "reasoning", "thought"):
+        parsed = parse_reasoning_response(f"<{tag}> plan </{tag}>\n answer ")
+        assert parsed == {"thinking": "plan", "answer": "answer"}
+
+def test_parse_reasoning_requires_matching_close_tag():
+    content = "<think>plan</thought> answer"
+    assert parse_reasoning_response(content) == {"thinking": "", "answer": content}
+
+def test_parse_reasoning_leaves_plain_answers_untouched():
+    assert parse_reasoning_response(" 2 + 2 = 4 ") == {"thinking": "", "answer": " 2 + 2 = 4 "}
+    assert parse_reasoning_response("") == {"thinking": "", "answer": ""}
+
+def test_format_thinking_marks_steps_only_in_long_text():
+    short = "Step 1 look\n\n\n\nStep 2 answer"
+    assert format_thinking_for_display(short) == "Step 1 look\n\nStep 2 answer"
+
+    long = "\n".join(f"Step {i} line" for i in range(1, 12))
+    assert format_thinking_for_display(long).startswith("**Step 1** line\n\n\n**Step 2**")
+
+def test_is_reasoning_model_matches_listed_and_keyword_models():
+    assert is_reasoning_model("openai/o1")
+    assert is_reasoning_model("openai/O3-Pro")
+    assert is_reasoning_model("acme/reasoner-large")
+    assert not is_reasoning_model("openai/gpt-4o")
+    assert not is_reasoning_model("anthropic/claude-3.5-sonnet")
@@ -1,5 +1,6 @@
 import os
 import json
+from unittest.mock import patch
 from backend import storage
 
 def test_create_conversation(test_data_dir):
@@ -42,3 +43,46 @@ def test_list_conversations(test_data_dir):
     ids = [c["id"] for c in convs]
     assert "c1" in ids
     assert "c2" in ids
+
+def test_concurrent_updates_are_not_lost(test_data_dir):
+    from concurrent.futures import ThreadPoolExecutor
+
+    storage.create_conversation("c1")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: storage.add_user_message("c1", f"msg {i}"), range(20)))
+
+    assert len(storage.get_conversation("c1")["messages"]) == 20
+    assert os.listdir(test_data_dir) == ["c1.json"]
+
+def test_get_conversation_reuses_parsed_file(test_data_dir):
+    storage.create_conversation("c1")
+    first = storage.get_conversation("c1")
+    with patch("backend.storage.orjson.loads") as loads:
+        assert storage.get_conversation("c1") == first
+    loads.assert_not_called()
+
+    # A write from another process changes the file signature
+    path = storage.get_conversation_path("c1")
+    with open(path, 'w') as f:
+        json.dump({**first, "title": "Changed elsewhere"}, f)
+    assert storage.get_conversation("c1")["title"] == "Changed elsewhere"
+
+def test_conversations_returned_to_callers_are_not_shared(test_data_dir):
+    storage.create_conversation("c1")
+    history = storage.add_user_message("c1", "Hello")["messages"]
+
+    # A later update must not change the history a council run is using
+    storage.add_user_message("c1", "Again")
+    assert len(history) == 1
+
+    conversation = storage.get_conversation("c1")
+    conversation["title"] = "Unsaved"
+    conversation["messages"].append({"role": "user", "content": "Unsaved"})
+    assert storage.get_conversation("c1")["title"] == "New Conversation"
+    assert len(storage.get_conversation("c1")["messages"]) == 2
+
+def test_add_user_message_returns_updated_conversation(test_data_dir):
+    storage.create_conversation("c1")
+    conversation = storage.add_user_message("c1", "Hello")
+    assert conversation["messages"][-1] == {"role": "user", "content": "Hello"}
+    assert storage.get_conversation("c1")["messages"] == conversation["messages"]
@@ -155,6 +155,13 @@ export function useConversation() {
             case 'stage3_start':
               updatedLastMsg.loading.stage3 = true;
               break;
+            case 'stage3_delta':
+              updatedLastMsg.stage3 = {
+                model: event.model,
+                response: (lastMsg.stage3?.response || '') + event.delta,
+              };
+              updatedLastMsg.loading.stage3 = false;
+              break;
             case 'stage3_complete':
               updatedLastMsg.stage3 = event.data;
               updatedLastMsg.loading.stage3 = false;